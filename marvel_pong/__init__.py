@@ -0,0 +1 @@
+"""Marvel Pong match rules and headless tooling."""
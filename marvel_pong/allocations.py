@@ -0,0 +1,92 @@
+"""
+Allocation diagnostic for the frame loop: net memory allocated per rally
+frame (``tracemalloc``) and the garbage collections that ran meanwhile.
+
+    probe = AllocationProbe(enabled=True)
+    probe.reset()                    # at match start
+    probe.begin_frame()
+    ... one frame ...
+    probe.end_frame(playing=True)    # only rally frames are counted
+    print(probe.report())
+
+A steady-state frame loop should show ~0 B net per frame and no
+collections. After `warmup` rally frames (text and skin caches filling up)
+a snapshot is taken; ``report()`` lists the source lines that have grown
+since. When ``enabled`` is false every call returns after one attribute
+check and tracemalloc is never started.
+"""
+import gc
+import tracemalloc
+
+WARMUP_FRAMES = 120
+TOP_SITES = 5
+
+
+class AllocationProbe:
+    """Net allocated bytes and GC runs per rally frame."""
+
+    def __init__(self, enabled=False, warmup=WARMUP_FRAMES):
+        self.enabled = enabled
+        self.warmup = warmup
+        self.collections = [0, 0, 0]
+        self.baseline = None
+        self.reset()
+        if enabled:
+            tracemalloc.start()
+            gc.callbacks.append(self._on_gc)
+
+    def _on_gc(self, phase, info):
+        if phase == "start" and self.in_frame and self.frames >= self.warmup:
+            self.collections[info["generation"]] += 1
+
+    def reset(self):
+        self.frames = 0
+        self.net_bytes = 0
+        self.grew = 0  # frames that ended with more memory allocated than they started with
+        self.worst = 0
+        self.collections[:] = (0, 0, 0)
+        self.baseline = None
+        self.in_frame = False
+        self.start = 0
+
+    def begin_frame(self):
+        if self.enabled:
+            self.start = tracemalloc.get_traced_memory()[0]
+            self.in_frame = True
+
+    def end_frame(self, playing):
+        if not self.enabled:
+            return
+        self.in_frame = False
+        if not playing:
+            return
+        delta = tracemalloc.get_traced_memory()[0] - self.start
+        self.frames += 1
+        if self.frames <= self.warmup:
+            if self.frames == self.warmup:
+                self.baseline = tracemalloc.take_snapshot()
+            return
+        self.net_bytes += delta
+        if delta > 0:
+            self.grew += 1
+            self.worst = max(self.worst, delta)
+
+    def report(self):
+        """One-line summary plus the top growing source lines since warmup."""
+        counted = self.frames - self.warmup
+        if counted <= 0:
+            return f"allocations: only {self.frames} rally frames (warmup {self.warmup})"
+        lines = [
+            f"allocations: {counted} rally frames, net {self.net_bytes / counted:+.1f} B/frame, "
+            f"{self.grew} frames grew (worst {self.worst} B), "
+            f"gc runs gen0/1/2 {self.collections[0]}/{self.collections[1]}/{self.collections[2]}"
+        ]
+        if self.baseline is not None:
+            snapshot = tracemalloc.take_snapshot().filter_traces(
+                (tracemalloc.Filter(False, tracemalloc.__file__),))
+            for stat in snapshot.compare_to(self.baseline, "lineno")[:TOP_SITES]:
+                if stat.size_diff > 0:
+                    frame = stat.traceback[0]
+                    lines.append(f"  {frame.filename}:{frame.lineno} "
+                                 f"{stat.size_diff:+d} B in {stat.count_diff:+d} blocks")
+        return "\n".join(lines)
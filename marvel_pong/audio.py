@@ -0,0 +1,123 @@
+"""
+Game audio: sounds decoded once, off the frame loop, then started and
+stopped with fades that never block a frame.
+
+    audio = AudioManager({"sweet_dreams": "assets/sweet_dreams_V1.ogg"})
+    audio.preload()           # background thread: opens the mixer, decodes every sound
+    audio.play("sweet_dreams")
+    audio.stop("sweet_dreams")
+
+``play``/``stop`` are idempotent and cheap enough to call every frame.
+Playing one track fades out whichever other track is playing (a
+crossfade). A track requested before its sound has loaded starts as soon as
+it has.
+
+``NullAudio`` has the same interface and does nothing; ``make_audio``
+returns it for headless runs so the mixer is never initialised.
+"""
+import os
+import threading
+
+FADE_MS = 400
+
+# Mixer settings (frequency, size, channels, buffer)
+MIXER_ARGS = (44100, -16, 2, 512)
+
+
+class AudioManager:
+    """
+    Named looping tracks from `sounds` ({name: path}). ``preload()`` opens
+    the mixer and decodes every file on a background thread; until then, or
+    if the mixer cannot be opened, the manager stays silent.
+    """
+
+    def __init__(self, sounds, fade_ms=FADE_MS):
+        self.paths = dict(sounds)
+        self.fade_ms = fade_ms
+        self.sounds = {}
+        self.channels = {}
+        self.current = None  # track that should be playing
+        self.error = None
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def preload(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._load, name="audio-preload", daemon=True)
+            self._thread.start()
+
+    def _load(self):
+        import pygame
+        try:
+            if not pygame.mixer.get_init():
+                pygame.mixer.init(*MIXER_ARGS)
+            for name, path in self.paths.items():
+                sound = pygame.mixer.Sound(path)
+                with self._lock:
+                    self.sounds[name] = sound
+                    if self.current == name:
+                        self._start(name)
+        except (pygame.error, OSError) as e:  # no audio device or missing file: play silently
+            self.error = e
+
+    def play(self, name):
+        """Loop track `name`, fading it in and fading out any other track."""
+        if self.current == name:
+            return
+        with self._lock:
+            if self.current is not None:
+                self._fade_out(self.current)
+            self.current = name
+            if name in self.sounds:
+                self._start(name)
+
+    def stop(self, name=None):
+        """Fade out track `name` (default: whatever is playing)."""
+        if self.current is None or (name is not None and name != self.current):
+            return
+        with self._lock:
+            self._fade_out(self.current)
+            self.current = None
+
+    def _start(self, name):
+        self.channels[name] = self.sounds[name].play(loops=-1, fade_ms=self.fade_ms)
+
+    def _fade_out(self, name):
+        channel = self.channels.pop(name, None)
+        if channel is not None and channel.get_sound() is self.sounds[name]:
+            channel.fadeout(self.fade_ms)
+
+    def close(self):
+        self.stop()
+
+
+class NullAudio:
+    """Same interface as ``AudioManager``; never touches the mixer."""
+
+    current = None
+
+    def preload(self):
+        pass
+
+    def play(self, name):
+        pass
+
+    def stop(self, name=None):
+        pass
+
+    def close(self):
+        pass
+
+
+def make_audio(sounds, enabled=None):
+    """
+    ``AudioManager(sounds)``, or ``NullAudio()`` when audio is off. By
+    default audio is off when SDL has no real video or audio driver
+    (``SDL_VIDEODRIVER``/``SDL_AUDIODRIVER`` set to "dummy") or
+    MARVEL_PONG_NO_AUDIO is set.
+    """
+    if enabled is None:
+        enabled = not (os.environ.get("MARVEL_PONG_NO_AUDIO")
+                       or os.environ.get("SDL_VIDEODRIVER") == "dummy"
+                       or os.environ.get("SDL_AUDIODRIVER") == "dummy")
+    return AudioManager(sounds) if enabled else NullAudio()
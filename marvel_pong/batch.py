@@ -0,0 +1,571 @@
+"""
+NumPy batch simulator: thousands of headless matches stepped in lockstep.
+
+Each match is one "lane" of a struct-of-arrays state (ball, paddles, meters,
+ability timers, rally counters). Every frame advances all lanes at once with
+boolean masks, following the same rules as ``engine.Match.step``. Lanes whose
+match ends are refilled with the next match until `n_matches` have been
+played, so the arrays stay full.
+
+The simulator only tracks state that can change a rally's outcome or its log
+row. Loki's illusion balls and holograms and Invisible Woman's hidden ball are
+visual and are not simulated. Players are vectorized tracking bots with the
+same behaviour as ``bots.TrackingBot``.
+
+Ball movement is swept (walls and paddles are hit at their time of impact),
+so ``frames_per_step`` > 1 can cover several frames per step without the
+ball tunnelling through a paddle; bots then decide once per step.
+
+Each step has a fixed cost of a few hundred NumPy calls on top of the
+per-lane work, so throughput keeps growing with the lane count well past a
+few thousand lanes. In steady state (every lane busy), lane-frames/s are
+about 100x the scalar engine's frames/s at 32k lanes and 110x at 64k (the
+default). End to end a run also pays for its tail: once no matches are left
+to start, lanes retire as their matches end and the last steps run nearly
+empty. Rallies/s therefore land lower, and lower still for runs no bigger
+than the lane count (Loki vs Iron Man, one core, against ~60 rallies/s for
+the scalar engine):
+
+    --matches 200000: ~5300 rallies/s (~85x)
+    --matches 30000:  ~4300 rallies/s (~70x); ~2200 with --lanes 8192
+
+    python -m marvel_pong.batch --matches 200000 --out rallies.csv
+"""
+import argparse
+import math
+import time
+
+import numpy as np
+
+from . import rally_log
+from .clock import FRAME_MS, SimulatedClock
+from .collisions import rect_time_of_impact, wall_time_of_impact
+from .engine import (
+    ABILITY_WIN_WINDOW_MS, CENTER_MARGIN, HEIGHT, HUD_H, INVIS_PASSIVE_MS,
+    INVISIBLE_WOMAN, IRON_ABILITY_MS, IRON_ABILITY_SPEED, IRON_MAN, LOKI,
+    LOKI_RAND_MAX_DEG, LOKI_RAND_MIN_DEG, MAX_DEFLECT_DEG, MAX_SPEED, METER_MAX,
+    MAX_SWEEP_EVENTS, MIN_SPEED, PADDLE_SPEED, POINTS_TO_WIN, POWER_NAMES, QUICKSILVER,
+    QUICKSILVER_ABILITY_MS, QUICKSILVER_FREEZE_MS, QUICKSILVER_HIT_FORCE,
+    QUICKSILVER_SPEED_BOOST, SPEEDUP_PER_HIT, WALL_DAMPING, WIDTH,
+    paddle_height, paddle_width, radius,
+)
+from .headless import write_rows
+
+# Power codes used in the lane arrays (index into POWER_NAMES)
+CODE_IRON, CODE_LOKI, CODE_INVIS, CODE_QS = (POWER_NAMES.index(p) for p in
+                                             (IRON_MAN, LOKI, INVISIBLE_WOMAN, QUICKSILVER))
+
+MAX_ANGLE = math.radians(MAX_DEFLECT_DEG)
+INF = float("inf")
+
+DEFAULT_LANES = 65536
+
+# Per-lane arrays; compacted together once lanes start retiring
+LANE_ARRAYS = (
+    "ball_x", "ball_y", "vx", "vy", "serve_vx", "serve_vy",
+    "left_y", "right_y", "left_travel_row", "right_travel_row",
+    "p1_code", "p2_code", "p1_meter", "p2_meter", "score_left", "score_right",
+    "p1_ability_until_ms", "p2_ability_until_ms", "p1_qs_until_ms", "p2_qs_until_ms",
+    "p1_qs_freeze_until_ms", "p2_qs_freeze_until_ms",
+    "freeze_left_until_ms", "freeze_right_until_ms",
+    "p1_loki_split_pending", "p2_loki_split_pending",
+    "p1_invis_passive_used", "p2_invis_passive_used",
+    "serving", "server_left", "active", "rally_index", "paddle_hits",
+    "p1_ability_uses", "p2_ability_uses", "rally_start_ms",
+    "p1_last_ability_ms", "p2_last_ability_ms",
+    "left_aim", "right_aim", "left_approaching", "right_approaching",
+)
+
+
+class BatchSim:
+    """
+    `n_matches` matches played `lanes` at a time. `p1_power`/`p2_power` fix a
+    character per side; None picks one at random for every match.
+    """
+
+    def __init__(self, n_matches, p1_power=None, p2_power=None, lanes=DEFAULT_LANES, seed=None,
+                 skill=0.8, serve_rate=0.05, ability_rate=0.01,
+                 width=WIDTH, height=HEIGHT, points_to_win=POINTS_TO_WIN, frames_per_step=1):
+        self.rng = np.random.default_rng(seed)
+        self.n_matches = n_matches
+        self.p1_fixed = None if p1_power is None else POWER_NAMES.index(p1_power)
+        self.p2_fixed = None if p2_power is None else POWER_NAMES.index(p2_power)
+        self.skill = skill
+        # Per-frame bot rates, as per-step chances when one step covers several frames
+        self.frames_per_step = k = frames_per_step
+        self.serve_rate = 1.0 - (1.0 - serve_rate) ** k
+        self.ability_rate = 1.0 - (1.0 - ability_rate) ** k
+        self.width, self.height = width, height
+        self.points_to_win = points_to_win
+
+        n = self.n = max(1, min(lanes, n_matches))
+        f8 = lambda: np.zeros(n)
+        b1 = lambda: np.zeros(n, dtype=bool)
+        i4 = lambda: np.zeros(n, dtype=np.int32)
+
+        # ball
+        self.ball_x, self.ball_y, self.vx, self.vy = f8(), f8(), f8(), f8()
+        self.serve_vx, self.serve_vy = f8(), f8()
+        # paddles
+        # Bots never fly horizontally, so Iron Man's x-offset stays at 0 and the
+        # hit rects' x (truncated, as pygame.Rect does) is the same in every lane
+        self.left_x = float(math.trunc(60 - paddle_width / 2))
+        self.right_x = float(math.trunc(width - (60 + paddle_width / 2)))
+        self.left_y, self.right_y = f8(), f8()
+        self.left_travel_row = np.zeros(n, dtype=np.int8)
+        self.right_travel_row = np.zeros(n, dtype=np.int8)
+        # characters / meters / score
+        self.p1_code, self.p2_code = i4(), i4()
+        self.p1_meter, self.p2_meter = i4(), i4()
+        self.score_left, self.score_right = i4(), i4()
+        # ability timers (ms of game time)
+        self.p1_ability_until_ms, self.p2_ability_until_ms = f8(), f8()
+        self.p1_qs_until_ms, self.p2_qs_until_ms = f8(), f8()
+        self.p1_qs_freeze_until_ms, self.p2_qs_freeze_until_ms = f8(), f8()
+        self.freeze_left_until_ms, self.freeze_right_until_ms = f8(), f8()
+        # ability flags
+        self.p1_loki_split_pending, self.p2_loki_split_pending = b1(), b1()
+        self.p1_invis_passive_used, self.p2_invis_passive_used = b1(), b1()
+        # rally tracking
+        self.serving, self.server_left, self.active = b1(), b1(), b1()
+        self.rally_index, self.paddle_hits = i4(), i4()
+        self.p1_ability_uses, self.p2_ability_uses = i4(), i4()
+        self.rally_start_ms = f8()
+        self.p1_last_ability_ms, self.p2_last_ability_ms = f8(), f8()
+        # bot state
+        self.left_aim, self.right_aim = f8(), f8()
+        self.left_approaching, self.right_approaching = b1(), b1()
+
+        self.lane_rows = [[] for _ in range(n)]
+        self.rows = []
+        self.started = 0
+        self.finished = 0
+        self.frame = 0
+        self.clock = SimulatedClock(FRAME_MS * k)  # all lanes share one game time
+
+        # Paddle travel per step, by [Quicksilver passive, Iron Man ability,
+        # slowed by the enemy Quicksilver, direction + 1], and the ball's speed
+        # factor by [Quicksilver ability running, Quicksilver freeze]. Lanes
+        # index these tables: a gather is cheaper than masked arithmetic.
+        speed = np.array([PADDLE_SPEED + 0.0, PADDLE_SPEED + QUICKSILVER_SPEED_BOOST]) * k
+        speed = np.stack([speed, np.full(2, IRON_ABILITY_SPEED * k)], axis=1)
+        speed = np.stack([speed, speed * 0.5], axis=2)
+        self.paddle_travel = (speed[..., None] * np.array([-1.0, 0.0, 1.0])).ravel()
+        self.ball_factor = np.array([1.0 * k, 0.5 * k, 0.0, 0.0])
+
+        self._start_matches(np.arange(n))
+
+    # ---- lane lifecycle ----
+    # Event helpers take index arrays: only a handful of lanes serve, score or
+    # fire an ability on any given frame.
+    def _start_matches(self, idx):
+        """Start the next matches in lanes `idx` (or retire them when none are left)."""
+        fresh = idx[:max(0, self.n_matches - self.started)]
+        self.active[idx] = False
+        k = len(fresh)
+        if k == 0:
+            return
+        self.started += k
+        self.p1_code[fresh] = self.rng.integers(0, 4, k) if self.p1_fixed is None else self.p1_fixed
+        self.p2_code[fresh] = self.rng.integers(0, 4, k) if self.p2_fixed is None else self.p2_fixed
+        # each side's paddle_travel row for its character, direction offset included
+        self.left_travel_row[fresh] = np.where(self.p1_code[fresh] == CODE_QS, 13, 1)
+        self.right_travel_row[fresh] = np.where(self.p2_code[fresh] == CODE_QS, 13, 1)
+        self.p1_meter[fresh] = 0
+        self.p2_meter[fresh] = 0
+        self.score_left[fresh] = 0
+        self.score_right[fresh] = 0
+        self.rally_index[fresh] = 0
+        self.active[fresh] = True
+        self._reset_ball(fresh, right_scored=np.ones(k, dtype=bool))
+
+    def _reset_ball(self, idx, right_scored):
+        """Vectorized Match.reset_ball for lanes `idx`."""
+        k = len(idx)
+        h = self.height
+        self.ball_x[idx] = self.width / 2
+        self.ball_y[idx] = HUD_H + (h - HUD_H) / 2
+        self.left_y[idx] = HUD_H + (h - HUD_H - paddle_height) / 2
+        self.right_y[idx] = HUD_H + (h - HUD_H - paddle_height) / 2
+
+        # who serves next (the one who got scored on); serve goes AWAY from the server
+        self.server_left[idx] = right_scored
+        speed = self.rng.uniform(2.0, 2.5, (2, k))
+        sign_y = np.where(self.rng.random(k) < 0.5, 1.0, -1.0)
+        self.serve_vx[idx] = np.where(right_scored, speed[0], -speed[0])
+        self.serve_vy[idx] = speed[1] * sign_y
+        self.vx[idx] = 0.0
+        self.vy[idx] = 0.0
+
+        for arr in (self.p1_ability_until_ms, self.p2_ability_until_ms,
+                    self.p1_qs_until_ms, self.p2_qs_until_ms,
+                    self.p1_qs_freeze_until_ms, self.p2_qs_freeze_until_ms,
+                    self.freeze_left_until_ms, self.freeze_right_until_ms):
+            arr[idx] = 0.0
+        self.p1_loki_split_pending[idx] = False
+        self.p2_loki_split_pending[idx] = False
+        # the passive counts as spent for anyone but Invisible Woman
+        self.p1_invis_passive_used[idx] = self.p1_code[idx] != CODE_INVIS
+        self.p2_invis_passive_used[idx] = self.p2_code[idx] != CODE_INVIS
+        self.serving[idx] = True
+
+    def _begin_rally(self, idx, now_ms):
+        self.rally_index[idx] += 1
+        self.rally_start_ms[idx] = now_ms
+        self.paddle_hits[idx] = 0
+        self.p1_ability_uses[idx] = 0
+        self.p2_ability_uses[idx] = 0
+        self.p1_last_ability_ms[idx] = np.nan
+        self.p2_last_ability_ms[idx] = np.nan
+
+    def _end_rallies(self, idx, p1_won, now_ms):
+        """Record rows for lanes `idx`, then score and re-serve them."""
+        speed = np.hypot(self.vx[idx], self.vy[idx])
+        duration_s = (now_ms - self.rally_start_ms[idx]) / 1000.0
+        p1_recent = (now_ms - self.p1_last_ability_ms[idx]) <= ABILITY_WIN_WINDOW_MS
+        p2_recent = (now_ms - self.p2_last_ability_ms[idx]) <= ABILITY_WIN_WINDOW_MS
+        cols = zip(idx.tolist(), self.rally_index[idx].tolist(), self.paddle_hits[idx].tolist(),
+                   speed.tolist(), duration_s.tolist(), self.p1_ability_uses[idx].tolist(),
+                   self.p2_ability_uses[idx].tolist(), p1_won.tolist(),
+                   (p1_won & p1_recent).tolist(), (~p1_won & p2_recent).tolist())
+        for lane, ri, hits, spd, dur, u1, u2, w, f1, f2 in cols:
+            self.lane_rows[lane].append((ri, hits, spd, dur, u1, u2, "P1" if w else "P2", f1, f2))
+
+        won, lost = idx[p1_won], idx[~p1_won]
+        self.score_left[won] += 1
+        self.score_right[lost] += 1
+        self.p1_meter[idx] = np.minimum(METER_MAX, self.p1_meter[idx] + np.where(p1_won, 1, 2))
+        self.p2_meter[idx] = np.minimum(METER_MAX, self.p2_meter[idx] + np.where(p1_won, 2, 1))
+        self._reset_ball(idx, right_scored=~p1_won)
+
+        over = idx[(self.score_left[idx] >= self.points_to_win) |
+                   (self.score_right[idx] >= self.points_to_win)]
+        if len(over):
+            for lane in over.tolist():
+                self.rows.extend(self.lane_rows[lane])
+                self.lane_rows[lane] = []
+            self.finished += len(over)
+            self._start_matches(over)
+            if self.started >= self.n_matches and self.active.sum() * 2 < self.n:
+                self._compact()
+
+    def _compact(self):
+        """Drop retired lanes so the tail of a run only pays for live matches."""
+        keep = np.flatnonzero(self.active)
+        for name in LANE_ARRAYS:
+            setattr(self, name, getattr(self, name)[keep])
+        self.lane_rows = [self.lane_rows[i] for i in keep.tolist()]
+        self.n = len(keep)
+
+    # ---- per-frame update ----
+    def _move_paddles(self, paddle_y, direction, travel_row, iron_on, slowed):
+        """
+        Move one side's paddles one step in `direction` (-1, 0, +1), in place:
+        `travel_row` is the side's base row into paddle_travel, `iron_on` and
+        `slowed` the lanes running Iron Man's ability and the enemy Quicksilver's.
+        """
+        row = travel_row + direction
+        row += iron_on.view(np.int8) * 6
+        row += slowed.view(np.int8) * 3
+        paddle_y += self.paddle_travel.take(row.astype(np.intp))
+        np.clip(paddle_y, HUD_H, self.height - paddle_height, out=paddle_y)
+
+    def _roll(self, n, rate):
+        """Sorted positions in range(n) whose bot presses the key this step, each with chance `rate`."""
+        # Gaps between presses are geometric: one random number per press
+        # rather than one per lane, same odds.
+        if rate <= 0.0 or n == 0:
+            return np.empty(0, dtype=np.intp)
+        size = int(n * rate * 1.1) + 16
+        press = np.cumsum(self.rng.geometric(rate, size)) - 1
+        while press[-1] < n:  # rare: ran out of draws before the last position
+            press = np.concatenate([press, press[-1] + np.cumsum(self.rng.geometric(rate, size))])
+        return press[:np.searchsorted(press, n)]
+
+    def _bot_dir(self, paddle_y, approaching, was_approaching, aim, stuck):
+        """Tracking-bot vertical direction (-1, 0, +1) for one side; 0 in `stuck` lanes."""
+        new = approaching > was_approaching
+        if new.any():
+            aim[new] = self.rng.normal(0.0, paddle_height * (1.0 - self.skill), int(new.sum()))
+        # Aim at the ball while it comes in, else go back to mid-field: the
+        # target is picked by multiplying with the mask, which is much cheaper
+        # than np.where over floats with a mixed mask. (In-place ops: fresh
+        # lane-sized temporaries cost more than the arithmetic.)
+        mid = HUD_H + (self.height - HUD_H) / 2
+        delta = self.ball_y + aim
+        delta -= mid
+        delta *= approaching
+        delta -= paddle_y
+        delta += mid - paddle_height / 2
+        dead = PADDLE_SPEED * self.frames_per_step
+        direction = (delta > dead).view(np.int8) - (delta < -dead).view(np.int8)
+        direction *= ~stuck
+        return direction
+
+    def _activate(self, idx, now_ms, side):
+        """Ability activation for lanes `idx` (meter already checked)."""
+        if side == "left":
+            code, uses, last, meter = self.p1_code, self.p1_ability_uses, self.p1_last_ability_ms, self.p1_meter
+            iron_until, qs_until, enemy_freeze = self.p1_ability_until_ms, self.p1_qs_until_ms, self.p2_qs_freeze_until_ms
+            split = self.p1_loki_split_pending
+        else:
+            code, uses, last, meter = self.p2_code, self.p2_ability_uses, self.p2_last_ability_ms, self.p2_meter
+            iron_until, qs_until, enemy_freeze = self.p2_ability_until_ms, self.p2_qs_until_ms, self.p1_qs_freeze_until_ms
+            split = self.p2_loki_split_pending
+        uses[idx] += 1
+        last[idx] = now_ms
+        meter[idx] = 0
+        c = code[idx]
+        iron_until[idx[c == CODE_IRON]] = now_ms + IRON_ABILITY_MS
+        split[idx[c == CODE_LOKI]] = True
+        qs = idx[c == CODE_QS]
+        qs_until[qs] = now_ms + QUICKSILVER_ABILITY_MS
+        enemy_freeze[qs] = now_ms + QUICKSILVER_FREEZE_MS
+
+    def _paddle_hit(self, idx, left, now_ms):
+        """Snap, meter, deflection and Loki split for lanes `idx` that hit a paddle (`left`: which one)."""
+        self.ball_x[idx] = np.where(left, self.left_x + paddle_width + radius, self.right_x - radius)
+        p1, p2 = idx[left], idx[~left]
+        self.p1_meter[p1] = np.minimum(METER_MAX, self.p1_meter[p1] + 1)
+        self.p2_meter[p2] = np.minimum(METER_MAX, self.p2_meter[p2] + 1)
+        self.paddle_hits[idx] += 1
+
+        # normalized contact offset (-1..+1) -> deflection angle
+        paddle_y = np.where(left, self.left_y[idx], self.right_y[idx])
+        offset = (self.ball_y[idx] - (paddle_y + paddle_height / 2)) / (paddle_height / 2)
+        angle = offset * MAX_ANGLE
+        speed = np.maximum(MIN_SPEED, np.hypot(self.vx[idx], self.vy[idx]))
+        qs_until = np.where(left, self.p1_qs_until_ms[idx], self.p2_qs_until_ms[idx])
+        gain = SPEEDUP_PER_HIT * np.where(now_ms < qs_until, QUICKSILVER_HIT_FORCE, 1.0)
+        vx = np.where(left, speed, -speed) * np.cos(angle) * gain
+        vy = speed * np.sin(angle) * gain
+        new_speed = np.hypot(vx, vy)
+        scale = np.where(new_speed > MAX_SPEED, MAX_SPEED / new_speed, 1.0)
+        self.vx[idx] = vx * scale
+        self.vy[idx] = vy * scale
+
+        # Loki split: real ball leaves at a random angle off the horizontal, same speed
+        pending = np.where(left, self.p1_loki_split_pending[idx], self.p2_loki_split_pending[idx])
+        split, left = idx[pending], left[pending]
+        k = len(split)
+        if k:
+            self.p1_loki_split_pending[split[left]] = False
+            self.p2_loki_split_pending[split[~left]] = False
+            ang = np.radians(self.rng.uniform(LOKI_RAND_MIN_DEG, LOKI_RAND_MAX_DEG, k))
+            ang = np.where(self.rng.random(k) < 0.5, -ang, ang)
+            spd = np.hypot(self.vx[split], self.vy[split])
+            a = np.where(left, 0.0, math.pi) + ang
+            self.vx[split] = spd * np.cos(a)
+            self.vy[split] = spd * np.sin(a)
+
+    def _move_balls(self, play, scale, now_ms):
+        """
+        Vectorized Match._move_ball for the lanes in `play`: move each ball by
+        its velocity * `scale`, resolving wall and paddle contacts in
+        time-of-impact order. A ball's path and hits are the same whatever
+        `scale` is. Returns the lanes that needed the time-of-impact sweep;
+        every other ball moved in a straight line.
+        """
+        lx, rx = self.left_x, self.right_x
+
+        # Most balls are in open field. One pass finds the few whose move may
+        # touch a wall or come within reach of a paddle (1 px margins, so float
+        # rounding can't hide a contact); every other ball just moves. Lanes
+        # out of play have zero velocity, so moving them is a no-op.
+        nx = self.vx * scale
+        nx += self.ball_x
+        ny = self.vy * scale
+        ny += self.ball_y
+        touch = ((ny <= HUD_H + radius + 1.0) | (ny >= self.height - radius - 1.0)
+                 | (nx <= lx + paddle_width + radius + 1.0) | (nx >= rx - radius - 1.0))
+        touch &= play
+        idx = touched = np.flatnonzero(touch)
+        nx[idx] = self.ball_x[idx]
+        ny[idx] = self.ball_y[idx]
+        self.ball_x, self.ball_y = nx, ny
+        if not len(idx):
+            return touched
+        scale = scale[idx]
+        # paddle rects as pygame.Rect would truncate them
+        ly = np.trunc(self.left_y[idx])
+        ry = np.trunc(self.right_y[idx])
+        remaining = np.ones(len(idx))
+        for _ in range(MAX_SWEEP_EVENTS):
+            x, y, vx = self.ball_x[idx], self.ball_y[idx], self.vx[idx]
+            dx = vx * scale * remaining
+            dy = self.vy[idx] * scale * remaining
+            t = wall_time_of_impact(y, dy, self.height)
+            side = np.zeros(len(idx), dtype=np.int8)  # 0 wall, 1 left paddle, 2 right paddle
+            # A paddle only counts while the ball is heading toward it, so each
+            # ball has at most one: both sides go through one solve, and only
+            # for balls whose move's bounding box comes within reach of their
+            # paddle (1 px margin for rounding). The rest would all miss.
+            left = vx < 0
+            ex, ey = x + dx, y + dy
+            py = np.where(left, ly, ry)
+            reach = radius + 1.0
+            near = np.flatnonzero(
+                ((left & (ex - radius <= lx + paddle_width) & (x + reach >= lx))
+                 | ((vx > 0) & (ex + radius >= rx) & (x - reach <= rx + paddle_width)))
+                & (np.minimum(y, ey) - reach <= py + paddle_height) & (np.maximum(y, ey) + reach >= py))
+            if len(near):
+                left = left[near]
+                tp = rect_time_of_impact(x[near], y[near], dx[near], dy[near],
+                                         np.where(left, lx, rx), py[near],
+                                         paddle_width, paddle_height)
+                first = tp < t[near]
+                near = near[first]
+                t[near] = tp[first]
+                side[near] = np.where(left[first], 1, 2)
+
+            free = np.isinf(t)
+            done = idx[free]
+            self.ball_x[done] += dx[free]
+            self.ball_y[done] += dy[free]
+            hit = ~free
+            if not hit.any():
+                break
+            idx, t, dx, dy, side = idx[hit], t[hit], dx[hit], dy[hit], side[hit]
+            ly, ry = ly[hit], ry[hit]
+            scale, remaining = scale[hit], remaining[hit] * (1.0 - t)
+
+            self.ball_x[idx] += dx * t
+            wall = side == 0
+            w = idx[wall]
+            # wall bounce dampens ball speed
+            self.ball_y[w] = np.where(dy[wall] < 0, HUD_H + radius, self.height - radius)
+            self.vy[w] *= WALL_DAMPING
+            paddle = ~wall
+            self.ball_y[idx[paddle]] += (dy * t)[paddle]
+            if paddle.any():
+                self._paddle_hit(idx[paddle], side[paddle] == 1, now_ms)
+        return touched
+
+    def step(self):
+        """Advance every lane by `frames_per_step` frames."""
+        now = self.clock.now_ms()
+        self.clock.advance()
+        self.frame += 1
+        active = self.active
+
+        # ---- key-down events: serve, abilities, Invisible Woman passive ----
+        # Presses are rolled first and only the pressed lanes are checked:
+        # few lanes press anything on a given step.
+        serve_ready = np.flatnonzero(active & self.serving)
+        launch = serve_ready[self._roll(len(serve_ready), self.serve_rate)]
+        if len(launch):
+            self.vx[launch] = self.serve_vx[launch]
+            self.vy[launch] = self.serve_vy[launch]
+            self.serving[launch] = False
+            self._begin_rally(launch, now)
+        play = active & ~self.serving
+
+        # bots only fire during a rally (TrackingBot returns early while serving)
+        p1_fire = self._roll(self.n, self.ability_rate)
+        p1_fire = p1_fire[play[p1_fire] & (self.p1_meter[p1_fire] >= METER_MAX)]
+        p2_fire = self._roll(self.n, self.ability_rate)
+        p2_fire = p2_fire[play[p2_fire] & (self.p2_meter[p2_fire] >= METER_MAX)]
+        if len(p1_fire):
+            self._activate(p1_fire, now, "left")
+        if len(p2_fire):
+            self._activate(p2_fire, now, "right")
+
+        # lanes out of play have zero velocity, so this is the ball in play coming in
+        left_incoming = self.vx < 0
+        right_incoming = self.vx > 0
+        # one roll per lane, for whichever side still has the passive
+        passive_roll = self._roll(self.n, self.ability_rate)
+        passive_roll = passive_roll[play[passive_roll]]
+        if len(passive_roll):
+            p1_passive = passive_roll[~(left_incoming[passive_roll] | self.p1_invis_passive_used[passive_roll])]
+            p2_passive = passive_roll[~(right_incoming[passive_roll] | self.p2_invis_passive_used[passive_roll])]
+            self.freeze_right_until_ms[p1_passive] = now + INVIS_PASSIVE_MS
+            self.p1_invis_passive_used[p1_passive] = True
+            self.freeze_left_until_ms[p2_passive] = now + INVIS_PASSIVE_MS
+            self.p2_invis_passive_used[p2_passive] = True
+
+        # ---- paddles ----
+        p1_qs_freeze = now < self.p1_qs_freeze_until_ms
+        p2_qs_freeze = now < self.p2_qs_freeze_until_ms
+        left_frozen = (now < self.freeze_left_until_ms) | p1_qs_freeze
+        right_frozen = (now < self.freeze_right_until_ms) | p2_qs_freeze
+        qs_ball_frozen = p1_qs_freeze | p2_qs_freeze
+        p1_qs = now < self.p1_qs_until_ms
+        p2_qs = now < self.p2_qs_until_ms
+
+        # (retired lanes' paddles may drift: nothing reads them again)
+        left_dir = self._bot_dir(self.left_y, left_incoming, self.left_approaching, self.left_aim,
+                                 left_frozen)
+        right_dir = self._bot_dir(self.right_y, right_incoming, self.right_approaching, self.right_aim,
+                                  right_frozen)
+        self.left_approaching, self.right_approaching = left_incoming, right_incoming
+        # ability timers are only ever set for the owning character, so no code
+        # checks; Quicksilver ability halves the ENEMY paddle speed
+        self._move_paddles(self.left_y, left_dir, self.left_travel_row,
+                           now < self.p1_ability_until_ms, p2_qs)
+        self._move_paddles(self.right_y, right_dir, self.right_travel_row,
+                           now < self.p2_ability_until_ms, p1_qs)
+
+        if not play.any():
+            return
+
+        # ---- Quick Silver movement, walls and paddles swept along the way ----
+        row = (p1_qs | p2_qs).view(np.int8)
+        row += qs_ball_frozen.view(np.int8) * 2
+        touched = self._move_balls(play, self.ball_factor.take(row.astype(np.intp)), now)
+
+        # ---- scoring -> rows + SERVE ----
+        # a ball can only leave the field past a paddle, so only swept lanes are checked
+        x = self.ball_x[touched]
+        out = (x + radius < 0) | (x - radius > self.width)
+        if out.any():
+            ended = touched[out]
+            self._end_rallies(ended, x[out] - radius > self.width, now)
+
+    def run(self, max_frames=None):
+        """Step until every match is finished; returns rows grouped by match."""
+        while self.active.any() and (max_frames is None or self.frame < max_frames):
+            self.step()
+        return self.rows
+
+
+def simulate_batch(n_matches, p1_power=None, p2_power=None, lanes=DEFAULT_LANES, seed=None,
+                   log_path=None, **kwargs):
+    """Play `n_matches` matches on the batch engine; returns rally rows like simulate_match."""
+    rows = BatchSim(n_matches, p1_power, p2_power, lanes=lanes, seed=seed, **kwargs).run()
+    if log_path is not None:
+        write_rows(log_path, rows)
+    return rows
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Run many Marvel Pong matches in lockstep with NumPy.")
+    ap.add_argument("--matches", type=int, default=10000)
+    ap.add_argument("--lanes", type=int, default=DEFAULT_LANES, help="matches stepped together")
+    ap.add_argument("--p1", choices=POWER_NAMES, help="P1 character (random per match if omitted)")
+    ap.add_argument("--p2", choices=POWER_NAMES, help="P2 character (random per match if omitted)")
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--frames-per-step", type=int, default=1,
+                    help="game frames per simulation step (bigger = faster, coarser bots)")
+    ap.add_argument("--out", default=None, help="output path (default: a new match_log_* file)")
+    ap.add_argument("--columnar", action="store_true",
+                    help="write typed columns (Parquet, or .npy shards without pyarrow)")
+    args = ap.parse_args(argv)
+    try:
+        rally_log.check_out_path(args.out, args.columnar)
+    except ValueError as e:
+        ap.error(str(e))
+
+    writer = rally_log.RallyWriter(args.out, flush_rows=None, flush_ms=None, columnar=args.columnar)
+    t0 = time.perf_counter()
+    rows = simulate_batch(args.matches, args.p1, args.p2, lanes=args.lanes, seed=args.seed,
+                          frames_per_step=args.frames_per_step)
+    writer.write_many(rows)
+    writer.close()
+    dt = time.perf_counter() - t0
+    print(f"{args.matches} matches, {len(rows)} rallies in {dt:.2f}s "
+          f"({len(rows) / dt:.0f} rallies/s) -> {writer.path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""
+Scripted controllers for headless matches.
+
+A controller is any callable ``controller(match, side)`` returning
+``(held, presses)``: the buttons held this frame and the buttons newly pressed
+(key-down events), both drawn from ``engine.BTN_*``.
+"""
+import random
+
+from .engine import (
+    BTN_AWAY, BTN_DOWN, BTN_TOWARD, BTN_UP, HUD_H, INVISIBLE_WOMAN, METER_MAX,
+    PADDLE_SPEED, STATE_PLAY, STATE_SERVE, paddle_height,
+)
+
+HOLD_UP = (BTN_UP,)
+HOLD_DOWN = (BTN_DOWN,)
+HOLD_NONE = ()
+# Presses are shared tuples too: most frames press nothing, so no list is
+# built per call
+NO_PRESSES = ()
+PRESS_TOWARD = (BTN_TOWARD,)
+
+
+class TrackingBot:
+    """
+    Follows the ball with an aim error picked per approach, serves after a
+    short random delay and fires its ability some time after the meter fills.
+    `skill` in 0..1 shrinks the aim error; 1.0 still misses fast, steep balls.
+    """
+
+    def __init__(self, seed=None, skill=0.8, serve_rate=0.05, ability_rate=0.01):
+        self.rng = random.Random(seed)
+        self.skill = skill
+        self.serve_rate = serve_rate
+        self.ability_rate = ability_rate
+        self.aim = 0.0
+        self.approaching = False
+        self.second_press = False
+
+    def __call__(self, match, side):
+        rng = self.rng
+        left = (side == "left")
+        presses = NO_PRESSES
+
+        # second half of an ability double-press queued last frame
+        if self.second_press:
+            self.second_press = False
+            presses = PRESS_TOWARD
+
+        state = match.state
+        if state == STATE_SERVE:
+            if match.server == side and rng.random() < self.serve_rate:
+                presses += (BTN_DOWN if rng.random() < 0.5 else BTN_UP,)
+            return HOLD_NONE, presses
+
+        meter = match.p1_meter if left else match.p2_meter
+        if meter >= METER_MAX and not presses and rng.random() < self.ability_rate:
+            presses = PRESS_TOWARD
+            self.second_press = True
+
+        vx = match.ball_vel_x
+        approaching = state == STATE_PLAY and ((vx < 0) if left else (vx > 0))
+        if approaching and not self.approaching:
+            # new aim point for this approach; bigger error for weaker bots
+            self.aim = rng.gauss(0.0, paddle_height * (1.0 - self.skill))
+        self.approaching = approaching
+
+        power = match.p1_power if left else match.p2_power
+        if power == INVISIBLE_WOMAN and not approaching and state == STATE_PLAY:
+            used = match.p1_invis_passive_used if left else match.p2_invis_passive_used
+            if not used and rng.random() < self.ability_rate:
+                presses += (BTN_AWAY,)
+
+        paddle_y = match.left_y if left else match.right_y
+        if approaching:
+            target = match.ball_y + self.aim
+        else:
+            target = HUD_H + (match.height - HUD_H) / 2  # drift back to mid-field
+        delta = target - (paddle_y + paddle_height / 2)
+        if delta > PADDLE_SPEED:
+            return HOLD_DOWN, presses
+        if delta < -PADDLE_SPEED:
+            return HOLD_UP, presses
+        return HOLD_NONE, presses
@@ -0,0 +1,83 @@
+"""
+Game clocks. Every ability timer, the double-press window and the rally log
+read the time from a clock object instead of ``pygame.time.get_ticks()``.
+
+Both clocks have the same interface: ``now_ms()`` returns the current game
+time in milliseconds, and ``advance(frames=1)`` is called by ``Match.step``
+once per simulated frame.
+"""
+import time
+
+# Frame rate the px/frame speeds in the engine are tuned for
+FPS = 120
+FRAME_MS = 1000.0 / FPS
+
+
+class RealTimeClock:
+    """Wall time for interactive play. `source` returns ms (e.g. pygame.time.get_ticks)."""
+
+    def __init__(self, source=None):
+        if source is None:
+            t0 = time.perf_counter()
+            source = lambda: (time.perf_counter() - t0) * 1000.0
+        self.now_ms = source
+
+    def advance(self, frames=1):
+        pass  # wall time moves on its own
+
+
+class SimulatedClock:
+    """Game time that moves exactly `step_ms` per frame, independent of wall time."""
+
+    def __init__(self, step_ms=FRAME_MS, start_ms=0.0):
+        self.step_ms = step_ms
+        self.t = start_ms
+
+    def now_ms(self):
+        return self.t
+
+    def advance(self, frames=1):
+        self.t += self.step_ms * frames
+
+
+# Most physics steps one rendered frame may catch up on. Past this the leftover
+# time is dropped (the game slows down) instead of spiralling into ever longer frames.
+MAX_STEPS_PER_FRAME = 8
+
+
+class FixedTimestep:
+    """
+    Fixed-timestep accumulator. Each rendered frame, ``tick()`` adds the wall
+    time since the previous call and returns how many whole physics steps of
+    `step_ms` are due; ``alpha`` is the fraction of a step left over, used to
+    interpolate drawing between the last two physics states.
+
+    With ``max_steps=1`` there is no sub-stepping: at most one step per
+    frame, so slow frames slow the game down as they did before.
+    ``tick(catch_up=True)`` ignores the cap, for time the loop spent blocked
+    on purpose while nothing was moving.
+    """
+
+    def __init__(self, step_ms=FRAME_MS, max_steps=MAX_STEPS_PER_FRAME, source=None):
+        self.step_ms = step_ms
+        self.max_steps = max_steps
+        self.source = RealTimeClock(source).now_ms
+        self.reset()
+
+    def reset(self):
+        """Forget time spent outside the simulation (menus, win screen)."""
+        self.last_ms = self.source()
+        self.acc = 0.0
+        self.alpha = 0.0
+
+    def tick(self, catch_up=False):
+        now = self.source()
+        self.acc += now - self.last_ms
+        self.last_ms = now
+        steps = int(self.acc // self.step_ms)
+        if steps > self.max_steps and not catch_up:
+            steps = self.max_steps
+            self.acc = self.step_ms * steps  # drop the backlog we can't catch up on
+        self.acc -= steps * self.step_ms
+        self.alpha = self.acc / self.step_ms
+        return steps
@@ -0,0 +1,178 @@
+"""
+Vectorized collisions: many balls against the walls and a few paddle-like
+rects, for the batch simulator and the multi-ball mode.
+
+Rects are the rows of a small float array, columns ``RECT_COLUMNS``:
+position and size, the side a hit sends the ball to (``direction`` +1 for
+the left paddle and its hologram, -1 for the right ones) and the hit force
+multiplier (Quicksilver's ability). ``sweep_balls`` moves every ball one
+frame with the rules of ``engine.Match._move_ball``: contacts are found by
+time of impact and resolved in order, up to MAX_SWEEP_EVENTS per ball.
+Finding the contacts is split in two phases:
+
+- broadphase (``sweep_and_prune``): the balls are sorted by x, and each rect
+  binary-searches the run of balls close enough in x to reach it this frame,
+  then keeps those whose swept box overlaps it. Paddles sit near the side
+  lines, so balls in mid-field are never looked at again.
+- narrowphase (``rect_time_of_impact``): the exact swept-circle test of
+  ``engine.rect_time_of_impact``, over all candidate pairs at once.
+"""
+import math
+
+import numpy as np
+
+from .engine import (
+    HUD_H, MAX_DEFLECT_DEG, MAX_SPEED, MAX_SWEEP_EVENTS, MIN_SPEED, SPEEDUP_PER_HIT,
+    WALL_DAMPING, radius,
+)
+
+RECT_COLUMNS = ("x", "y", "w", "h", "direction", "force")
+RX, RY, RW, RH, RDIR, RFORCE = range(len(RECT_COLUMNS))
+
+MAX_ANGLE = math.radians(MAX_DEFLECT_DEG)
+INF = float("inf")
+
+
+def wall_time_of_impact(y, dy, height):
+    """Vectorized engine.wall_time_of_impact; inf where no wall is touched."""
+    with np.errstate(divide="ignore", invalid="ignore"):
+        t = np.where(dy < 0, (HUD_H + radius - y) / dy,
+                     np.where(dy > 0, (height - radius - y) / dy, INF))
+    return np.where(t > 1.0, INF, np.maximum(t, 0.0))
+
+
+def rect_time_of_impact(x, y, dx, dy, rx, ry, rw, rh):
+    """Vectorized engine.rect_time_of_impact against rects (rx, ry, rw, rh); inf on a miss."""
+    r = radius
+    cx = np.clip(x, rx, rx + rw)
+    cy = np.clip(y, ry, ry + rh)
+    overlap = (x - cx) ** 2 + (y - cy) ** 2 < r * r
+
+    t_enter = np.zeros_like(x)
+    t_exit = np.ones_like(x)
+    miss = np.zeros(len(x), dtype=bool)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        for p, d, lo, hi in ((x, dx, rx - r, rx + rw + r), (y, dy, ry - r, ry + rh + r)):
+            still = d == 0
+            miss |= still & ((p < lo) | (p > hi))
+            t0, t1 = (lo - p) / d, (hi - p) / d
+            t0, t1 = np.minimum(t0, t1), np.maximum(t0, t1)
+            t_enter = np.where(still, t_enter, np.maximum(t_enter, t0))
+            t_exit = np.where(still, t_exit, np.minimum(t_exit, t1))
+    miss |= t_enter > t_exit
+
+    # corner regions need the corner circle
+    ex, ey = x + dx * t_enter, y + dy * t_enter
+    corner = ((ex < rx) | (ex > rx + rw)) & ((ey < ry) | (ey > ry + rh))
+    fx = x - np.where(ex < rx, rx, rx + rw)
+    fy = y - np.where(ey < ry, ry, ry + rh)
+    a = dx * dx + dy * dy
+    b = fx * dx + fy * dy
+    disc = b * b - a * (fx * fx + fy * fy - r * r)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        tc = (-b - np.sqrt(np.maximum(disc, 0.0))) / a
+    corner_miss = (a == 0) | (disc < 0) | ~((tc >= 0.0) & (tc <= 1.0))
+    t = np.where(corner, np.where(corner_miss, INF, tc), t_enter)
+    t[miss] = INF
+    t[overlap] = 0.0
+    return t
+
+
+def sweep_and_prune(x, y, dx, dy, vx, rects):
+    """
+    Broadphase: (ball, rect) index arrays of the pairs that may touch during
+    the move (dx, dy). A rect is only paired with balls heading toward the
+    side it sends them away from, as in Match._move_ball.
+    """
+    order = np.argsort(x, kind="stable")
+    xs = x[order]
+    # farthest any ball's edge gets from its centre this frame
+    reach = float(np.abs(dx).max()) + radius
+    balls, owners = [], []
+    for k, (rx, ry, rw, rh, direction, _) in enumerate(rects):
+        lo, hi = np.searchsorted(xs, (rx - reach, rx + rw + reach))
+        near = order[lo:hi]
+        if not len(near):
+            continue
+        ex, ey = x[near] + dx[near], y[near] + dy[near]
+        yn = y[near]
+        keep = ((vx[near] * direction < 0)
+                & (np.minimum(yn, ey) - radius <= ry + rh) & (np.maximum(yn, ey) + radius >= ry)
+                & (np.minimum(x[near], ex) - radius <= rx + rw) & (np.maximum(x[near], ex) + radius >= rx))
+        near = near[keep]
+        balls.append(near)
+        owners.append(np.full(len(near), k))
+    if not balls:
+        return np.empty(0, dtype=np.intp), np.empty(0, dtype=np.intp)
+    return np.concatenate(balls), np.concatenate(owners)
+
+
+def deflect(y, vx, vy, rects):
+    """Vectorized Match._deflect: outgoing (vx, vy) for balls at `y` hitting `rects` (one row each)."""
+    ry, rh = rects[:, RY], rects[:, RH]
+    offset = (y - (ry + rh / 2)) / (rh / 2)
+    angle = offset * MAX_ANGLE
+    speed = np.maximum(MIN_SPEED, np.hypot(vx, vy))
+    gain = SPEEDUP_PER_HIT * rects[:, RFORCE]
+    vx = rects[:, RDIR] * speed * np.cos(angle) * gain
+    vy = speed * np.sin(angle) * gain
+    new_speed = np.hypot(vx, vy)
+    scale = np.where(new_speed > MAX_SPEED, MAX_SPEED / new_speed, 1.0)
+    return vx * scale, vy * scale
+
+
+def sweep_balls(xy, v, rects, height):
+    """
+    Move balls (`xy`, `v`: (n, 2) arrays, updated in place) one frame,
+    bouncing off the walls and `rects`. Returns the number of rect hits.
+    """
+    idx = np.arange(len(xy))
+    remaining = np.ones(len(xy))
+    hits = 0
+    for _ in range(MAX_SWEEP_EVENTS):
+        x, y, vx, vy = xy[idx, 0], xy[idx, 1], v[idx, 0], v[idx, 1]
+        dx, dy = vx * remaining, vy * remaining
+        t = wall_time_of_impact(y, dy, height)
+        owner = np.full(len(idx), -1)  # -1 wall, else the rect hit first
+
+        pairs, ks = sweep_and_prune(x, y, dx, dy, vx, rects)
+        if len(pairs):
+            r = rects[ks]
+            tp = rect_time_of_impact(x[pairs], y[pairs], dx[pairs], dy[pairs],
+                                     r[:, RX], r[:, RY], r[:, RW], r[:, RH])
+            # each ball's earliest rect contact; it must come strictly before the wall (as in Match._move_ball)
+            first = np.lexsort((tp, pairs))
+            pairs, ks, tp = pairs[first], ks[first], tp[first]
+            lead = np.ones(len(pairs), dtype=bool)
+            lead[1:] = pairs[1:] != pairs[:-1]
+            pairs, ks, tp = pairs[lead], ks[lead], tp[lead]
+            sooner = tp < t[pairs]
+            t[pairs[sooner]] = tp[sooner]
+            owner[pairs[sooner]] = ks[sooner]
+
+        free = np.isinf(t)
+        done = idx[free]
+        xy[done, 0] += dx[free]
+        xy[done, 1] += dy[free]
+        hit = ~free
+        if not hit.any():
+            break
+        idx, t, dx, dy, owner = idx[hit], t[hit], dx[hit], dy[hit], owner[hit]
+        remaining = remaining[hit] * (1.0 - t)
+
+        xy[idx, 0] += dx * t
+        wall = owner < 0
+        w = idx[wall]
+        # wall bounce dampens ball speed
+        xy[w, 1] = np.where(dy[wall] < 0, HUD_H + radius, height - radius)
+        v[w, 1] *= WALL_DAMPING
+
+        p = idx[~wall]
+        if len(p):
+            r = rects[owner[~wall]]
+            xy[p, 1] += (dy * t)[~wall]
+            # snap just outside the rect, on the side it sends the ball to
+            xy[p, 0] = np.where(r[:, RDIR] > 0, r[:, RX] + r[:, RW] + radius, r[:, RX] - radius)
+            v[p, 0], v[p, 1] = deflect(xy[p, 1], v[p, 0], v[p, 1], r)
+            hits += len(p)
+    return hits
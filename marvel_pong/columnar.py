@@ -0,0 +1,211 @@
+"""
+Typed columnar rally logs: the CSV fields stored as binary columns so that
+loading a large dataset does not re-parse text.
+
+Columns (``RALLY_DTYPE``): int32 counters, float32 speed and duration, the
+winner as a category (code 0 = "P1", 1 = "P2") and bool ability flags.
+
+Two storage backends, chosen when the sink is created:
+
+- pyarrow installed: one Parquet file, one row group per `row_group_size`
+  rows (or per flush), winner dictionary-encoded.
+- otherwise: a directory ``<name>_npy/`` of ``shard_NNNNN.npy`` files, each a
+  structured array of one row group, loadable with ``np.load(mmap_mode="r")``.
+
+``load_columns(path)`` reads either one back as a dict of NumPy arrays;
+``iter_shards(path)`` walks a shard directory one memory-mapped shard at a
+time.
+"""
+import glob
+import os
+
+import numpy as np
+
+from .rally_log import RALLY_FIELDS
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # optional: fall back to .npy shards
+    pa = pq = None
+
+WINNERS = ("P1", "P2")
+
+# Column types, in RALLY_FIELDS order (winner is a category code into WINNERS)
+COLUMN_TYPES = (np.int32, np.int32, np.float32, np.float32, np.int32, np.int32,
+                np.int8, np.bool_, np.bool_)
+RALLY_DTYPE = np.dtype(list(zip(RALLY_FIELDS, COLUMN_TYPES)))
+
+ROW_GROUP_SIZE = 65536
+
+
+def have_parquet():
+    return pq is not None
+
+
+def npy_dir_for(path):
+    """Shard directory used in place of `path` when pyarrow is missing."""
+    return os.path.splitext(path)[0] + "_npy"
+
+
+def rows_to_array(rows):
+    """Typed rally rows (tuples in RALLY_FIELDS order) -> one structured array."""
+    return np.array([row[:6] + (WINNERS.index(row[6]),) + row[7:] for row in rows],
+                    dtype=RALLY_DTYPE)
+
+
+def _arrow_schema():
+    return pa.schema([
+        (name, pa.dictionary(pa.int8(), pa.string()) if name == "winner"
+         else pa.from_numpy_dtype(RALLY_DTYPE[name]))
+        for name in RALLY_FIELDS
+    ])
+
+
+def _arrow_table(arr, schema):
+    winners = pa.array(WINNERS)
+    cols = [pa.DictionaryArray.from_arrays(pa.array(arr[name]), winners) if name == "winner"
+            else pa.array(arr[name]) for name in RALLY_FIELDS]
+    return pa.Table.from_arrays(cols, schema=schema)
+
+
+def check_path(path):
+    """Raise ValueError unless `path` is a new ``.parquet`` path (and its ``_npy`` fallback is new)."""
+    if os.path.splitext(path)[1].lower() != ".parquet":
+        raise ValueError(f"columnar logs are Parquet: {path!r} should end in .parquet")
+    target = path if pq is not None else npy_dir_for(path)
+    if os.path.exists(target):
+        raise ValueError(f"{target!r} already exists; columnar logs are never appended to")
+
+
+class ColumnarSink:
+    """
+    Typed rally rows -> Parquet (or .npy shards). Rows are buffered and
+    written one row group at a time; ``flush()`` writes a short group early.
+    Same write/flush/sync/close interface as the CSV sink in ``rally_log``.
+    """
+
+    def __init__(self, path, row_group_size=ROW_GROUP_SIZE):
+        self.row_group_size = row_group_size
+        self.rows = []
+        self.unsynced = []
+        if pq is not None:
+            self.path = path
+            self.file = open(path, "xb")
+            self.schema = _arrow_schema()
+            self.writer = pq.ParquetWriter(self.file, self.schema)
+        else:
+            self.path = npy_dir_for(path)
+            os.mkdir(self.path)
+            self.file = self.writer = None
+            self.shards = 0
+
+    def write(self, row):
+        self.rows.append(row)
+        if len(self.rows) >= self.row_group_size:
+            self.flush()
+
+    def write_many(self, rows):
+        self.rows.extend(rows)
+        while len(self.rows) >= self.row_group_size:
+            self._write_group(self.rows[:self.row_group_size])
+            del self.rows[:self.row_group_size]
+
+    def flush(self):
+        if self.rows:
+            self._write_group(self.rows)
+            self.rows = []
+
+    def _write_group(self, rows):
+        arr = rows_to_array(rows)
+        if self.writer is not None:
+            self.writer.write_table(_arrow_table(arr, self.schema))
+            self.file.flush()
+        else:
+            shard = os.path.join(self.path, f"shard_{self.shards:05d}.npy")
+            self.shards += 1
+            np.save(shard, arr)
+            self.unsynced.append(shard)
+
+    def sync(self):
+        self.flush()
+        if self.file is not None:
+            os.fsync(self.file.fileno())
+        for shard in self.unsynced:
+            fd = os.open(shard, os.O_RDONLY)
+            try:
+                os.fsync(fd)
+            finally:
+                os.close(fd)
+        self.unsynced = []
+
+    def close(self):
+        self.sync()
+        if self.writer is not None:
+            self.writer.close()  # writes the Parquet footer
+            self.file.flush()
+            os.fsync(self.file.fileno())
+            self.file.close()
+
+
+def _resolve(path):
+    """`path`, or its ``_npy`` shard directory if only that was written."""
+    if not os.path.isdir(path) and not os.path.exists(path) and os.path.isdir(npy_dir_for(path)):
+        return npy_dir_for(path)
+    return path
+
+
+def _load_shards(path, mmap):
+    return [np.load(p, mmap_mode="r" if mmap else None)
+            for p in sorted(glob.glob(os.path.join(path, "shard_*.npy")))]
+
+
+def iter_shards(path, mmap=True):
+    """
+    Yield ``{field: ndarray}`` for each shard of an .npy shard directory (or
+    the fallback of a Parquet path), in write order. With `mmap` the columns
+    are views of the memory-mapped shard, so nothing is read until used.
+    """
+    path = _resolve(path)
+    if not os.path.isdir(path):
+        raise ValueError(f"{path!r} is not a shard directory")
+    for arr in _load_shards(path, mmap):
+        yield {name: arr[name] for name in RALLY_FIELDS}
+
+
+def load_columns(path, mmap=True):
+    """
+    Load a columnar rally log as ``{field: ndarray}``. `path` is a Parquet
+    file, a shard directory, or a Parquet path whose ``_npy`` fallback was
+    written instead. ``winner`` comes back as int8 codes into ``WINNERS``.
+
+    `mmap` only avoids reading the data into memory for a single .npy shard:
+    several shards are concatenated, which copies every column. Use
+    ``iter_shards()`` to stay memory-mapped over a multi-shard log.
+    """
+    path = _resolve(path)
+
+    if os.path.isdir(path):
+        shards = _load_shards(path, mmap)
+        if not shards:
+            arr = np.empty(0, dtype=RALLY_DTYPE)
+        elif len(shards) == 1:
+            arr = shards[0]
+        else:
+            arr = np.concatenate(shards)
+        return {name: arr[name] for name in RALLY_FIELDS}
+
+    if pq is None:
+        raise ImportError("reading Parquet rally logs needs pyarrow")
+    table = pq.read_table(path, memory_map=mmap)
+    cols = {}
+    for name in RALLY_FIELDS:
+        col = table.column(name)
+        if name == "winner":
+            cols[name] = np.concatenate(
+                [np.array([WINNERS.index(w) for w in chunk.dictionary.to_pylist()],
+                          dtype=np.int8)[chunk.indices.to_numpy()]
+                 for chunk in col.chunks]) if col.num_chunks else np.empty(0, np.int8)
+        else:
+            cols[name] = col.to_numpy()
+    return cols
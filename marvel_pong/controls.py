@@ -0,0 +1,68 @@
+"""
+Keyboard bindings: keys -> engine buttons during a match, and the hero
+select actions on the menu. Importing this module needs pygame but does not
+initialise it.
+"""
+import pygame
+
+from .engine import BTN_AWAY, BTN_DOWN, BTN_TOWARD, BTN_UP
+
+# Keyboard -> engine buttons, per side
+P1_KEYS = {pygame.K_w: BTN_UP, pygame.K_s: BTN_DOWN, pygame.K_d: BTN_TOWARD, pygame.K_a: BTN_AWAY}
+P2_KEYS = {pygame.K_UP: BTN_UP, pygame.K_DOWN: BTN_DOWN, pygame.K_LEFT: BTN_TOWARD, pygame.K_RIGHT: BTN_AWAY}
+
+# Toggles the frame-timing overlay (any screen)
+KEY_TIMING_OVERLAY = pygame.K_F3
+# Profiles the next rally, or ends the window being profiled (marvel_pong.profiling)
+KEY_PROFILE = pygame.K_F9
+
+# Menu actions
+MENU_PREV = "prev"
+MENU_NEXT = "next"
+MENU_READY = "ready"
+MENU_UNREADY = "unready"
+
+# Menu key -> (player 1 or 2, action)
+MENU_KEYS = {
+    pygame.K_w: (1, MENU_PREV), pygame.K_s: (1, MENU_NEXT),
+    pygame.K_d: (1, MENU_READY), pygame.K_a: (1, MENU_UNREADY),
+    pygame.K_UP: (2, MENU_PREV), pygame.K_DOWN: (2, MENU_NEXT),
+    pygame.K_RIGHT: (2, MENU_READY), pygame.K_LEFT: (2, MENU_UNREADY),
+}
+
+
+def _held_table(bindings):
+    """Tuple of held buttons for every bitmask of `bindings` (bit i = i-th key held)."""
+    buttons = tuple(bindings.values())
+    return [tuple(b for i, b in enumerate(buttons) if mask >> i & 1) for mask in range(1 << len(buttons))]
+
+
+# (key, bit) pairs and mask -> held-buttons tuple, so polling allocates nothing
+_P1_BITS = tuple((k, 1 << i) for i, k in enumerate(P1_KEYS))
+_P2_BITS = tuple((k, 1 << i) for i, k in enumerate(P2_KEYS))
+_P1_HELD = _held_table(P1_KEYS)
+_P2_HELD = _held_table(P2_KEYS)
+
+
+def held_buttons(keys):
+    """
+    (left held, right held) engine buttons from a ``pygame.key.get_pressed()``
+    state. The tuples are shared, one per combination of held keys.
+    """
+    left = right = 0
+    for k, bit in _P1_BITS:
+        if keys[k]:
+            left |= bit
+    for k, bit in _P2_BITS:
+        if keys[k]:
+            right |= bit
+    return _P1_HELD[left], _P2_HELD[right]
+
+
+def key_press(key):
+    """(side, button) for a match key-down, or None if `key` is not bound."""
+    if key in P1_KEYS:
+        return "left", P1_KEYS[key]
+    if key in P2_KEYS:
+        return "right", P2_KEYS[key]
+    return None
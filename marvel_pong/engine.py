@@ -0,0 +1,1106 @@
+"""
+Match rules for Marvel Pong, with no rendering and no pygame dependency.
+
+The windowed game and the headless tools both drive a ``Match`` through the
+same two calls per frame: ``press()`` for every key-down event, then
+``step()`` for the continuous update. Everything that decides the outcome of
+a rally (paddle movement, ball physics, character passives/abilities,
+scoring and the per-rally log row) lives here.
+"""
+import itertools
+import math
+import random
+from operator import attrgetter
+
+from .clock import FPS, FRAME_MS, SimulatedClock
+
+# ----------------- PLAYFIELD -----------------
+WIDTH, HEIGHT = 1200, 600
+
+# Height of top HUD band (gameplay can't enter this area)
+HUD_H = 80
+
+# How close paddles may get to the midline when flying horizontally (px)
+CENTER_MARGIN = 350  # smaller = can get closer to center
+
+# ----------------- BALL / PADDLES -----------------
+radius = 10
+paddle_width, paddle_height = 20, 120
+PADDLE_SPEED = 4.0  # px/frame
+
+# ----------------- PHYSICS TUNING -----------------
+MAX_DEFLECT_DEG = 60
+SPEEDUP_PER_HIT = 1.20
+MIN_SPEED       = 2.0
+MAX_SPEED       = 50.0
+WALL_DAMPING    = -0.8
+# Most wall/paddle contacts resolved for one ball in one frame
+MAX_SWEEP_EVENTS = 8
+
+# ----------------- GAME STATES -----------------
+STATE_SERVE = "serve"
+STATE_PLAY  = "play"
+STATE_OVER  = "over"
+
+POINTS_TO_WIN = 5
+
+# ----------------- CHARACTERS -----------------
+IRON_MAN        = "Iron Man"
+LOKI            = "Loki"
+INVISIBLE_WOMAN = "Invisible Woman"
+QUICKSILVER     = "QuickSilver"
+POWER_NAMES = (IRON_MAN, LOKI, INVISIBLE_WOMAN, QUICKSILVER)
+
+# -------- IRON MAN CONFIG --------
+IRON_X_NUDGE_SPEED = 3.0        # passive horizontal nudge speed
+IRON_ABILITY_SPEED = 5.5        # absolute paddle speed during ability
+IRON_ABILITY_MS    = 9000       # 9 seconds
+
+# -------- QUICKSILVER CONFIG --------
+QUICKSILVER_SPEED_BOOST = 3.5   # passive: px/frame over base paddle speed
+QUICKSILVER_ABILITY_MS  = 18000  # 18 seconds
+QUICKSILVER_FREEZE_MS   = 2000   # initial 2s freeze (enemy + real ball)
+QUICKSILVER_HIT_FORCE   = 1.35   # extra hit force multiplier during ability
+
+# -------- INVISIBLE WOMAN CONFIG --------
+INVIS_PASSIVE_MS = 750  # ~.75 s freeze
+
+# -------- LOKI CONFIG --------
+LOKI_RAND_MIN_DEG = 12   # min ball bounce degree range
+LOKI_RAND_MAX_DEG = 40   # max ball bounce degree range
+LOKI_MIN_SEP_DEG  = 10   # min separation between the two fake-ball angles
+LOKI_ILLUSIONS    = 2    # fake balls per split; raise (Match(loki_illusions=...)) to stress-test
+CLONE_SPAWN_GAP = 75             # Clone spawn gap (px) so it doesn't overlap at spawn
+
+# -------- MULTI-BALL MODE (experimental) --------
+# Loki's illusion balls also bounce off the paddles ("paddles"), or off the
+# paddles and the active holograms ("holograms"); they still never score.
+MULTIBALL_PADDLES   = "paddles"
+MULTIBALL_HOLOGRAMS = "holograms"
+MULTIBALL_MODES = (MULTIBALL_PADDLES, MULTIBALL_HOLOGRAMS)
+
+# Per-player meters (generic for all characters)
+METER_MAX = 8
+
+# Double-press detection
+DOUBLE_PRESS_THRESHOLD = 250  # ms
+
+# ----------------- INPUT -----------------
+# Each side has four buttons. "toward" flies toward the midline and fires the
+# ability on a double-press; "away" flies back and triggers Invisible Woman's
+# passive. The windowed game maps keys onto these (P1: W/S/D/A,
+# P2: Up/Down/Left/Right).
+BTN_UP     = "up"
+BTN_DOWN   = "down"
+BTN_TOWARD = "toward"
+BTN_AWAY   = "away"
+
+# Ability window used by the *_win_within_8s_after_ability log columns
+ABILITY_WIN_WINDOW_MS = 8000
+
+
+# ----------------- PURE HELPERS -----------------
+def wall_time_of_impact(y, dy, height):
+    """
+    Fraction (0..1) of the vertical move `dy` at which the ball touches the
+    HUD ceiling or the floor (0.0 if already against the wall it is moving
+    into), or None if it gets through the move without touching either.
+    """
+    if dy < 0:
+        t = (HUD_H + radius - y) / dy
+    elif dy > 0:
+        t = (height - radius - y) / dy
+    else:
+        return None
+    if t > 1.0:
+        return None
+    return max(t, 0.0)
+
+
+def bounce_top_bottom(y, vy, height, scale=1.0):
+    """
+    Move a ball one frame (`vy` * `scale` px) with damped bounces against the
+    HUD ceiling and floor, resolved at their time of impact. Returns new (y, vy).
+    """
+    remaining = 1.0
+    for _ in range(MAX_SWEEP_EVENTS):
+        dy = vy * scale * remaining
+        t = wall_time_of_impact(y, dy, height)
+        if t is None:
+            return y + dy, vy
+        y = HUD_H + radius if dy < 0 else height - radius
+        vy *= WALL_DAMPING
+        remaining *= 1.0 - t
+    return y, vy
+
+
+def rect_time_of_impact(x, y, dx, dy, rect):
+    """
+    Fraction (0..1) of the move (dx, dy) at which a ball of `radius` centred
+    at (x, y) first touches `rect` (x, y, w, h); 0.0 if it already overlaps,
+    None if it misses. A swept circle against a rect is a ray against the
+    rect grown by the radius, with rounded corners.
+    """
+    rx, ry, rw, rh = rect
+    # already overlapping?
+    cx = min(max(x, rx), rx + rw)
+    cy = min(max(y, ry), ry + rh)
+    if (x - cx) ** 2 + (y - cy) ** 2 < radius * radius:
+        return 0.0
+
+    # ray vs the grown box (slab test)
+    t_enter, t_exit = 0.0, 1.0
+    for p, d, lo, hi in ((x, dx, rx - radius, rx + rw + radius),
+                         (y, dy, ry - radius, ry + rh + radius)):
+        if d == 0:
+            if p < lo or p > hi:
+                return None
+            continue
+        t0, t1 = (lo - p) / d, (hi - p) / d
+        if t0 > t1:
+            t0, t1 = t1, t0
+        t_enter = max(t_enter, t0)
+        t_exit = min(t_exit, t1)
+        if t_enter > t_exit:
+            return None
+
+    # entering next to a side: that is the contact; next to a corner: test the corner circle
+    ex, ey = x + dx * t_enter, y + dy * t_enter
+    kx = rx if ex < rx else (rx + rw if ex > rx + rw else None)
+    ky = ry if ey < ry else (ry + rh if ey > ry + rh else None)
+    if kx is None or ky is None:
+        return t_enter
+    fx, fy = x - kx, y - ky
+    a = dx * dx + dy * dy
+    b = fx * dx + fy * dy
+    disc = b * b - a * (fx * fx + fy * fy - radius * radius)
+    if a == 0 or disc < 0:
+        return None
+    t = (-b - math.sqrt(disc)) / a
+    return t if 0.0 <= t <= 1.0 else None
+
+
+def compute_trajectory_points(x, y, vx, vy, target_x, height, radius, max_bounces=12):
+    """
+    Predict the piecewise-linear path of a ball at (x, y) moving (vx, vy) until
+    it reaches target_x, bouncing off the HUD ceiling and the floor with the
+    same WALL_DAMPING as the match (each bounce keeps 0.8 of the vertical
+    speed, so the bounces spread out). The number of bounces and the time of
+    each one are closed-form (a geometric series), not stepped. Returns the
+    start, every bounce point (at most `max_bounces`) and the point at
+    target_x; only the start if the ball is not moving toward target_x.
+    """
+    pts = [(x, y)]
+    if (target_x - x) * vx <= 0:
+        return pts  # not moving toward target
+    top, bottom = HUD_H + radius, height - radius
+    t_end = (target_x - x) / vx
+    speed_y = abs(vy)
+    if speed_y == 0 or bottom <= top:
+        pts.append((target_x, y))
+        return pts
+
+    # time to the first wall, then each crossing of the span takes 1/damp longer
+    # than the last: bounce k happens at t1 + (span / speed_y) * sum(q**j, j=1..k-1)
+    damp = abs(WALL_DAMPING)
+    q = 1.0 / damp
+    wall = top if vy < 0 else bottom
+    t1 = abs(wall - y) / speed_y
+    if t_end <= t1:
+        pts.append((target_x, y + vy * t_end))
+        return pts
+    cross = (bottom - top) / speed_y
+
+    def bounce_time(k):
+        return t1 + cross * q * (q ** (k - 1) - 1.0) / (q - 1.0)
+
+    # bounces strictly before t_end: largest k with bounce_time(k) < t_end
+    reach = 1.0 + (t_end - t1) / (cross * q) * (q - 1.0)
+    n = max(1, math.ceil(math.log(reach) / math.log(q)))
+    while n > 1 and bounce_time(n) >= t_end:  # guard against rounding at the boundary
+        n -= 1
+    n = min(n, max_bounces)
+
+    t = t1
+    for k in range(1, n + 1):
+        t = bounce_time(k)
+        pts.append((x + vx * t, wall))
+        if k < n:
+            wall = bottom if wall == top else top
+    # leave the last wall at the damped vertical speed
+    away = 1.0 if wall == top else -1.0
+    end_y = wall + away * speed_y * damp ** n * (t_end - t)
+    pts.append((target_x, max(top, min(bottom, end_y))))
+    return pts
+
+
+# ----------------- FAKE BALLS -----------------
+# Pools up to this size step ball by ball in Python, larger ones as arrays
+SCALAR_BALLS = 8
+
+
+class BallPool:
+    """
+    Loki's fake balls as parallel NumPy arrays (struct of arrays): rows
+    ``[0, count)`` of `xy` and `v` are the live balls, in spawn order. A
+    step integrates, bounces and culls them all in a few array operations,
+    so hundreds cost little more than two. The arrays are allocated on the
+    first spawn and doubled when full, never shrunk; numpy is only imported
+    then, so matches without Loki never load it.
+    """
+
+    def __init__(self, capacity=16):
+        self.capacity = capacity
+        self.count = 0
+        self.xy = self.v = None  # (capacity, 2) position and velocity
+        self.prev = None         # positions before the last step (for interpolation)
+        self._draw = None        # interpolated() output buffer
+
+    def __len__(self):
+        return self.count
+
+    def clear(self):
+        self.count = 0
+
+    def _reserve(self, n):
+        """Make room for `n` live balls (doubling the arrays, keeping the live rows)."""
+        import numpy as np
+        if self.xy is not None and n <= len(self.xy):
+            return
+        while self.capacity < n:
+            self.capacity *= 2
+        live, old = self.count, (self.xy, self.v, self.prev)
+        self.xy, self.v, self.prev, self._draw = (np.zeros((self.capacity, 2)) for _ in range(4))
+        if old[0] is not None:
+            for new, a in zip((self.xy, self.v, self.prev), old):
+                new[:live] = a[:live]
+
+    def spawn(self, x, y, vxs, vys):
+        """Add one ball per (vx, vy) pair, all starting at (x, y)."""
+        n = len(vxs)
+        self._reserve(self.count + n)
+        rows = slice(self.count, self.count + n)
+        self.xy[rows] = (x, y)
+        self.prev[rows] = (x, y)
+        self.v[rows, 0] = vxs
+        self.v[rows, 1] = vys
+        self.count += n
+
+    def step(self, width, height, rects=None):
+        """
+        Move every ball one frame: same damped wall bounces as
+        bounce_top_bottom(), then cull off-screen ones. With `rects` (multi-ball
+        mode, see marvel_pong.collisions) the balls also bounce off those.
+        """
+        n = self.count
+        if not n:
+            return
+        self.prev[:n] = self.xy[:n]
+        if rects is not None:
+            from .collisions import sweep_balls
+            sweep_balls(self.xy[:n], self.v[:n], rects, height)
+            x = self.xy[:n, 0]
+            gone = x.min() + radius < 0 or x.max() - radius > width
+        elif n <= SCALAR_BALLS:
+            # a handful of balls: numpy's per-call overhead would cost more than the loop
+            xy, v = self.xy[:n].tolist(), self.v[:n].tolist()
+            gone = False
+            for p, q in zip(xy, v):
+                p[0] += q[0]
+                p[1], q[1] = bounce_top_bottom(p[1], q[1], height)
+                gone = gone or p[0] + radius < 0 or p[0] - radius > width
+            self.xy[:n] = xy
+            self.v[:n] = v
+        else:
+            self._step_arrays(n, height)
+            x = self.xy[:n, 0]
+            gone = x.min() + radius < 0 or x.max() - radius > width
+        if gone:
+            x = self.xy[:n, 0]
+            keep = (x + radius >= 0) & (x - radius <= width)
+            kept = int(keep.sum())
+            for a in (self.xy, self.v, self.prev):
+                a[:kept] = a[:n][keep]
+            self.count = kept
+
+    def _step_arrays(self, n, height):
+        """Vectorized step(): every ball's sweep through its wall contacts at once."""
+        import numpy as np
+        xy, v = self.xy[:n], self.v[:n]
+        x, y, vy = xy[:, 0], xy[:, 1], v[:, 1]
+        x += v[:, 0]
+
+        top, bottom = HUD_H + radius, height - radius
+        dy = vy.copy()
+        remaining = np.ones(n)
+        t = np.empty(n)
+        active = np.ones(n, dtype=bool)
+        for _ in range(MAX_SWEEP_EVENTS):
+            # time of impact with the wall each ball is heading to (as wall_time_of_impact)
+            wall = np.where(dy < 0, top, bottom)
+            moving = dy != 0
+            np.divide(wall - y, dy, out=t, where=moving)
+            hit = active & moving & (t <= 1.0)
+            if not hit.any():
+                y[active] += dy[active]
+                return
+            free = active & ~hit
+            y[free] += dy[free]
+            y[hit] = wall[hit]
+            vy[hit] *= WALL_DAMPING
+            remaining[hit] *= 1.0 - np.maximum(t[hit], 0.0)
+            active = hit
+            dy = vy * remaining
+
+    def interpolated(self, alpha):
+        """(count, 2) positions blended from before to after the last step (a reused buffer)."""
+        import numpy as np
+        n = self.count
+        out = self._draw[:n]
+        np.subtract(self.xy[:n], self.prev[:n], out=out)
+        out *= alpha
+        out += self.prev[:n]
+        return out
+
+    def snapshot(self):
+        """Copies of the live rows (None when empty), for Match.snapshot()."""
+        n = self.count
+        if not n:
+            return None
+        return self.xy[:n].copy(), self.v[:n].copy(), self.prev[:n].copy()
+
+    def restore(self, rows):
+        """Make the live balls exactly the `rows` of an earlier snapshot()."""
+        self.count = 0
+        if rows is None:
+            return
+        n = len(rows[0])
+        self._reserve(n)
+        for a, saved in zip((self.xy, self.v, self.prev), rows):
+            a[:n] = saved
+        self.count = n
+
+
+# ----------------- SNAPSHOTS -----------------
+# Every Match attribute that changes during play and holds an immutable value
+# (number, string, bool, None). Configuration (characters, points_to_win,
+# callbacks) and the reused rect lists are not state.
+STATE_FIELDS = (
+    "width", "height", "left_x", "right_x", "state", "winner", "server",
+    "score_left", "score_right", "p1_meter", "p2_meter",
+    "ball_x", "ball_y", "ball_vel_x", "ball_vel_y", "serve_vx", "serve_vy", "ball_epoch",
+    "left_y", "right_y", "left_x_offset", "right_x_offset",
+    "rally_index", "rally_start_ms", "paddle_hits",
+    "p1_ability_uses", "p2_ability_uses", "p1_last_ability_ms", "p2_last_ability_ms",
+    "p1_ability_until_ms", "p2_ability_until_ms",
+    "p1_qs_until_ms", "p2_qs_until_ms", "p1_qs_freeze_until_ms", "p2_qs_freeze_until_ms",
+    "freeze_left_until_ms", "freeze_right_until_ms",
+    "p1_invis_passive_used", "p2_invis_passive_used", "p1_invis_hide_pending", "p2_invis_hide_pending",
+    "ball_invisible", "last_ball_x",
+    "holo_left_active", "holo_right_active", "holo_left_sign", "holo_right_sign",
+    "holo_left_y", "holo_right_y",
+    "p1_loki_split_pending", "p2_loki_split_pending",
+)
+_get_state = attrgetter(*STATE_FIELDS)
+_STATE_INDEX = {name: i for i, name in enumerate(STATE_FIELDS)}
+
+
+class GameState:
+    """
+    Everything needed to put a Match back where it was: the STATE_FIELDS
+    values as one tuple, the RNG state, the game time, the last double-press
+    times and copies of the fake-ball arrays. Nothing in it is shared with
+    the match, and nothing is deep-copied: the values are immutable and the
+    arrays are flat copies. Made by ``Match.snapshot()``; treat as read-only.
+    """
+
+    __slots__ = ("values", "rng_state", "now_ms", "toward_press_ms", "fake_balls")
+
+    def __init__(self, values, rng_state, now_ms, toward_press_ms, fake_balls):
+        self.values = values
+        self.rng_state = rng_state
+        self.now_ms = now_ms
+        self.toward_press_ms = toward_press_ms
+        self.fake_balls = fake_balls
+
+    def __getattr__(self, name):
+        # state.ball_x etc. read the field from the values tuple
+        try:
+            return self.values[_STATE_INDEX[name]]
+        except KeyError:
+            raise AttributeError(name) from None
+
+
+# ----------------- MATCH -----------------
+# Ball epochs come from one counter for the whole process, so no two
+# trajectories (across restores, clones and new matches) share an epoch
+_ball_epochs = itertools.count(1)
+
+
+class Match:
+    """
+    One match between two characters.
+
+    Attribute names follow the original game globals (``ball_x``,
+    ``p1_meter``, ``freeze_left_until_ms`` ...) so renderers can read them
+    directly. ``on_rally`` is called with one row per finished rally, in
+    ``rally_log.RALLY_FIELDS`` order. Times come from `clock` (see
+    ``marvel_pong.clock``); the default is simulated game time.
+    """
+
+    def __init__(self, p1_power, p2_power, seed=None, width=WIDTH, height=HEIGHT,
+                 on_rally=None, points_to_win=POINTS_TO_WIN, clock=None,
+                 loki_illusions=LOKI_ILLUSIONS, multiball=None):
+        if multiball is not None and multiball not in MULTIBALL_MODES:
+            raise ValueError(f"multiball must be one of {', '.join(MULTIBALL_MODES)} or None, not {multiball!r}")
+        self.p1_power = p1_power
+        self.p2_power = p2_power
+        self.loki_illusions = loki_illusions
+        self.multiball = multiball
+        self.rng = random.Random(seed)
+        # Every timer reads this clock; a SimulatedClock moves one frame per step()
+        self.clock = SimulatedClock() if clock is None else clock
+        self.on_rally = on_rally
+        self.points_to_win = points_to_win
+
+        self.width, self.height = int(width), int(height)
+        self.left_x  = 60 - paddle_width / 2
+        self.right_x = self.width - (60 + paddle_width / 2)
+
+        self.score_left  = 0
+        self.score_right = 0
+        self.winner = None
+        self.p1_meter = 0   # 0..8
+        self.p2_meter = 0   # 0..8
+
+        # per-rally tracking
+        self.rally_index = 0
+        self.rally_start_ms = 0
+        self.paddle_hits = 0
+        self.p1_ability_uses = 0
+        self.p2_ability_uses = 0
+        self.p1_last_ability_ms = None
+        self.p2_last_ability_ms = None
+
+        # Double-press detection (per side)
+        self.last_toward_press_ms = {"left": -10_000_000, "right": -10_000_000}
+
+        # Fake (illusory) balls (Loki ability)
+        self.fake_balls = BallPool()
+        self.holo_left_y = 0
+        self.holo_right_y = 0
+
+        # A new value every time the ball's velocity changes (serve, reset, any bounce)
+        # or the match is restored; within one epoch the ball moves in a straight line
+        # (see compute_trajectory_points), so it can key caches of the ball's path
+        self.ball_epoch = 0
+
+        # (x, y, w, h) lists filled in place by paddle_rects()/ball_rect() every frame
+        self._left_rect = [0, 0, int(paddle_width), int(paddle_height)]
+        self._right_rect = [0, 0, int(paddle_width), int(paddle_height)]
+        self._ball_rect = [0, 0, int(radius * 2), int(radius * 2)]
+
+        self.reset_ball(right_scored=True)
+
+    # ---- per-rally tracking ----
+    def begin_rally(self, now_ms):
+        """Call this exactly when a new serve begins."""
+        self.rally_index += 1
+        self.rally_start_ms = now_ms
+        self.paddle_hits = 0
+        self.p1_ability_uses = 0
+        self.p2_ability_uses = 0
+        self.p1_last_ability_ms = None
+        self.p2_last_ability_ms = None
+
+    def rally_row(self, winner, end_vx, end_vy, now_ms):
+        """Summary row for the rally that just ended (typed, unformatted)."""
+        duration_s = (now_ms - self.rally_start_ms) / 1000.0
+        end_speed = math.hypot(end_vx, end_vy)  # pixels/frame
+        p1_win_within_8s = ((winner == "P1") and (self.p1_last_ability_ms is not None)
+                            and ((now_ms - self.p1_last_ability_ms) <= ABILITY_WIN_WINDOW_MS))
+        p2_win_within_8s = ((winner == "P2") and (self.p2_last_ability_ms is not None)
+                            and ((now_ms - self.p2_last_ability_ms) <= ABILITY_WIN_WINDOW_MS))
+        return (
+            self.rally_index,
+            self.paddle_hits,
+            end_speed,
+            duration_s,
+            self.p1_ability_uses,
+            self.p2_ability_uses,
+            winner,
+            bool(p1_win_within_8s),
+            bool(p2_win_within_8s),
+        )
+
+    # ---- snapshots (lookahead bots, rollback) ----
+    def snapshot(self):
+        """The match's current state as a GameState; O(state size), nothing shared."""
+        presses = self.last_toward_press_ms
+        return GameState(_get_state(self), self.rng.getstate(), self.clock.now_ms(),
+                         (presses["left"], presses["right"]), self.fake_balls.snapshot())
+
+    def restore(self, state):
+        """
+        Put the match back to `state` (from snapshot() of this match or one
+        with the same characters and settings). Game time is only rewound on a
+        SimulatedClock. Stepping on from there replays the same frames (under
+        new ball epochs), and fires on_rally again for rallies that end.
+        """
+        self.__dict__.update(zip(STATE_FIELDS, state.values))
+        self.rng.setstate(state.rng_state)
+        if isinstance(self.clock, SimulatedClock):
+            self.clock.t = state.now_ms
+        presses = self.last_toward_press_ms
+        presses["left"], presses["right"] = state.toward_press_ms
+        self.fake_balls.restore(state.fake_balls)
+        # the restored ball may be on a different path than the one last seen under its epoch
+        self.ball_epoch = next(_ball_epochs)
+
+    def clone(self, on_rally=None):
+        """An independent copy of this match (own SimulatedClock and RNG), e.g. for lookahead."""
+        twin = Match(self.p1_power, self.p2_power, width=self.width, height=self.height,
+                     on_rally=on_rally, points_to_win=self.points_to_win,
+                     loki_illusions=self.loki_illusions, multiball=self.multiball)
+        twin.restore(self.snapshot())
+        return twin
+
+    # ---- geometry ----
+    def resize(self, new_w, new_h):
+        """Keep paddles and ball inside a resized playfield."""
+        self.width, self.height = int(new_w), int(new_h)
+
+        # Recompute right paddle base x (depends on width)
+        self.right_x = self.width - (60 + paddle_width / 2)
+
+        # Clamp paddles inside playfield (below HUD)
+        self.clamp_paddles_vertical()
+
+        # Keep ball inside new bounds (respect HUD top)
+        if self.ball_x < radius: self.ball_x = radius
+        if self.ball_x > self.width - radius: self.ball_x = self.width - radius
+        if self.ball_y < HUD_H + radius: self.ball_y = HUD_H + radius
+        if self.ball_y > self.height - radius: self.ball_y = self.height - radius
+
+    def paddle_rects(self):
+        """
+        Return (left_rect, right_rect) as [x, y, w, h] including horizontal
+        offsets. The two lists are reused: they are overwritten by the next call.
+        """
+        left_rect, right_rect = self._left_rect, self._right_rect
+        left_rect[0]  = int(self.left_x  + self.left_x_offset)
+        left_rect[1]  = int(self.left_y)
+        right_rect[0] = int(self.right_x + self.right_x_offset)
+        right_rect[1] = int(self.right_y)
+        return left_rect, right_rect
+
+    def ball_rect(self):
+        """[x, y, w, h] of the ball; reused like paddle_rects()."""
+        rect = self._ball_rect
+        rect[0] = int(self.ball_x - radius)
+        rect[1] = int(self.ball_y - radius)
+        return rect
+
+    def collider_rects(self, now_ms):
+        """
+        Multi-ball colliders: one row per paddle (and active hologram, in
+        "holograms" mode) with the columns of ``collisions.RECT_COLUMNS``.
+        """
+        import numpy as np
+        left_rect, right_rect = self.paddle_rects()
+        w, h = left_rect[2], left_rect[3]
+        left_force = QUICKSILVER_HIT_FORCE if self.p1_power == QUICKSILVER and now_ms < self.p1_qs_until_ms else 1.0
+        right_force = QUICKSILVER_HIT_FORCE if self.p2_power == QUICKSILVER and now_ms < self.p2_qs_until_ms else 1.0
+        rows = [(left_rect[0], left_rect[1], w, h, 1.0, left_force),
+                (right_rect[0], right_rect[1], w, h, -1.0, right_force)]
+        if self.multiball == MULTIBALL_HOLOGRAMS:
+            # a hologram stands in for the enemy paddle at that paddle's x
+            if self.holo_left_active:
+                rows.append((left_rect[0], int(self.holo_left_y), w, h, 1.0, left_force))
+            if self.holo_right_active:
+                rows.append((right_rect[0], int(self.holo_right_y), w, h, -1.0, right_force))
+        return np.array(rows, dtype=float)
+
+    def clamp_paddles_vertical(self):
+        """Clamp paddles vertically to the playfield area below the HUD."""
+        if self.left_y < HUD_H: self.left_y = HUD_H
+        if self.left_y + paddle_height > self.height: self.left_y = self.height - paddle_height
+        if self.right_y < HUD_H: self.right_y = HUD_H
+        if self.right_y + paddle_height > self.height: self.right_y = self.height - paddle_height
+
+    # ---- state helpers ----
+    def random_ball_velocity(self):
+        # Random speed per-axis in 2.0–2.5 px/frame, random direction
+        rng = self.rng
+        sx = rng.uniform(2.0, 2.5) * (1 if rng.random() < 0.5 else -1)
+        sy = rng.uniform(2.0, 2.5) * (1 if rng.random() < 0.5 else -1)
+        return sx, sy
+
+    def reset_ball(self, right_scored):
+        """Enter SERVE after a point; center ball/paddles and set serve direction."""
+        # center ball & paddles in the playfield (not inside HUD)
+        self.ball_x = self.width / 2
+        self.ball_y = HUD_H + (self.height - HUD_H) / 2
+        self.left_y  = HUD_H + (self.height - HUD_H - paddle_height) / 2
+        self.right_y = HUD_H + (self.height - HUD_H - paddle_height) / 2
+
+        # who serves next (the one who got scored on)
+        self.server = "left" if right_scored else "right"
+
+        # random velocity; force it AWAY from the server
+        vx, vy = self.random_ball_velocity()
+        if self.server == "left":
+            vx = abs(vx)   # serve to the right
+        else:
+            vx = -abs(vx)  # serve to the left
+
+        self.serve_vx, self.serve_vy = vx, vy
+        self.ball_vel_x, self.ball_vel_y = 0.0, 0.0
+        self.ball_epoch = next(_ball_epochs)
+
+        # Reset Iron offsets and active ability timers (meters persist)
+        self.left_x_offset = 0.0
+        self.right_x_offset = 0.0
+        self.p1_ability_until_ms = 0
+        self.p2_ability_until_ms = 0
+
+        # Loki state reset per rally
+        self.holo_left_active = False
+        self.holo_right_active = False
+        self.fake_balls.clear()
+        self.holo_left_sign = 0
+        self.holo_right_sign = 0
+        self.p1_loki_split_pending = False
+        self.p2_loki_split_pending = False
+
+        # Invisible Woman reset per rally
+        self.freeze_left_until_ms = 0
+        self.freeze_right_until_ms = 0
+        self.p1_invis_passive_used = False
+        self.p2_invis_passive_used = False
+        self.p1_invis_hide_pending = False
+        self.p2_invis_hide_pending = False
+        self.ball_invisible = False
+        self.last_ball_x = self.ball_x
+
+        # Quick Silver reset per rally
+        self.p1_qs_until_ms = 0
+        self.p2_qs_until_ms = 0
+        self.p1_qs_freeze_until_ms = 0  # LEFT side is frozen when RIGHT uses QS
+        self.p2_qs_freeze_until_ms = 0  # RIGHT side is frozen when LEFT uses QS
+
+        self.state = STATE_SERVE
+
+    def quicksilver_any_active(self, now_ms=None):
+        now_ms = self.clock.now_ms() if now_ms is None else now_ms
+        return ((self.p1_power == QUICKSILVER and now_ms < self.p1_qs_until_ms) or
+                (self.p2_power == QUICKSILVER and now_ms < self.p2_qs_until_ms))
+
+    def next_timer_ms(self, now_ms=None):
+        """Game time at which the next running ability/freeze timer runs out, or None."""
+        now_ms = self.clock.now_ms() if now_ms is None else now_ms
+        ends = [t for t in (self.p1_ability_until_ms, self.p2_ability_until_ms,
+                            self.freeze_left_until_ms, self.freeze_right_until_ms,
+                            self.p1_qs_until_ms, self.p2_qs_until_ms,
+                            self.p1_qs_freeze_until_ms, self.p2_qs_freeze_until_ms)
+                if t > now_ms]
+        return min(ends) if ends else None
+
+    # ---- Loki helpers ----
+    def random_angle_vec(self, speed, toward_right, deg_min=LOKI_RAND_MIN_DEG, deg_max=LOKI_RAND_MAX_DEG):
+        """Return (vx,vy) of length 'speed' with a random angle measured off the horizontal."""
+        ang = math.radians(self.rng.uniform(deg_min, deg_max))
+        if self.rng.random() < 0.5:
+            ang = -ang
+        base = 0.0 if toward_right else math.pi  # 0 = +x, pi = -x
+        a = base + ang
+        return speed * math.cos(a), speed * math.sin(a)
+
+    def spawn_loki_fake_balls(self, out_x, out_y, out_vx, out_vy):
+        """
+        Spawn `loki_illusions` (normally two) fake balls at independent random
+        angles, each at least LOKI_MIN_SEP_DEG from the first; all keep the
+        real ball's speed.
+        """
+        s = math.hypot(out_vx, out_vy)
+        if s < 1e-6 or self.loki_illusions < 1:
+            return
+
+        toward_right = (out_vx > 0)
+        rng = self.rng
+
+        # pick two distinct random angles (relative to horizontal), ensure separation
+        def pick_angle_deg():
+            d = rng.uniform(LOKI_RAND_MIN_DEG, LOKI_RAND_MAX_DEG)
+            return (+d if rng.random() < 0.5 else -d)
+
+        angles = [pick_angle_deg()]
+        while len(angles) < self.loki_illusions:
+            a = pick_angle_deg()
+            if abs(a - angles[0]) >= LOKI_MIN_SEP_DEG:
+                angles.append(a)
+
+        # convert to vectors
+        base = 0.0 if toward_right else math.pi
+        rads = [math.radians(a) + base for a in angles]
+        self.fake_balls.spawn(out_x, out_y, [s * math.cos(a) for a in rads], [s * math.sin(a) for a in rads])
+
+    def mirror_y_of(self, enemy_y, side):
+        """Hologram Y: a fixed gap above or below the enemy paddle, side picked once per rally."""
+        sign = self.holo_left_sign if side == "left" else self.holo_right_sign
+
+        if sign == 0:
+            above_ok = (enemy_y - (paddle_height + CLONE_SPAWN_GAP)) >= HUD_H
+            below_ok = (enemy_y + paddle_height + CLONE_SPAWN_GAP + paddle_height) <= self.height
+            if above_ok and below_ok:
+                sign = self.rng.choice([-1, 1])
+            elif above_ok:
+                sign = -1
+            elif below_ok:
+                sign = +1
+            else:
+                space_above = enemy_y - HUD_H
+                space_below = self.height - (enemy_y + paddle_height)
+                sign = -1 if space_above >= space_below else +1
+            if side == "left":
+                self.holo_left_sign = sign
+            else:
+                self.holo_right_sign = sign
+
+        y = enemy_y + sign * (paddle_height + CLONE_SPAWN_GAP)
+        y = max(HUD_H, min(self.height - paddle_height, y))
+        return y
+
+    # ---- collisions ----
+    def _deflect(self, paddle_y, direction, hit_force):
+        """Outgoing velocity after a paddle hit; direction is +1 (to the right) or -1."""
+        # normalized contact offset (-1..+1): top=-1, center=0, bottom=+1
+        offset = (self.ball_y - (paddle_y + paddle_height / 2)) / (paddle_height / 2)
+
+        # target angle
+        max_angle = math.radians(MAX_DEFLECT_DEG)
+        angle = offset * max_angle
+
+        # keep current speed magnitude (at least MIN_SPEED)
+        speed = max(MIN_SPEED, math.hypot(self.ball_vel_x, self.ball_vel_y))
+
+        vx = direction * speed * math.cos(angle)
+        vy = speed * math.sin(angle)
+
+        # speed up
+        vx *= SPEEDUP_PER_HIT
+        vy *= SPEEDUP_PER_HIT
+
+        # Quicksilver extra hit force when ability active
+        if hit_force:
+            vx *= QUICKSILVER_HIT_FORCE
+            vy *= QUICKSILVER_HIT_FORCE
+
+        # clamp to MAX_SPEED
+        new_speed = math.hypot(vx, vy)
+        if new_speed > MAX_SPEED:
+            s = MAX_SPEED / new_speed
+            vx *= s
+            vy *= s
+        return vx, vy
+
+    def paddle_bounce_for_left(self, left_rect, now_ms):
+        # snap just outside paddle
+        self.ball_x = left_rect[0] + left_rect[2] + radius
+
+        # Meter: left player hit +1
+        self.p1_meter = min(METER_MAX, self.p1_meter + 1)
+        self.paddle_hits += 1
+
+        # outgoing to the right
+        self.ball_vel_x, self.ball_vel_y = self._deflect(
+            self.left_y, +1, self.p1_power == QUICKSILVER and now_ms < self.p1_qs_until_ms)
+
+        if self.p1_power == INVISIBLE_WOMAN and self.p1_invis_hide_pending:
+            self.ball_invisible = True
+            self.last_ball_x = self.ball_x
+            self.p1_invis_hide_pending = False
+
+        # ---- Loki collision ----
+        if self.p1_power == LOKI:
+            self.holo_right_active = True  # appears now
+        self.holo_left_active = False      # clear enemy's hologram on this side
+
+        if self.p1_power == LOKI and self.p1_loki_split_pending:
+            self.spawn_loki_fake_balls(self.ball_x, self.ball_y, self.ball_vel_x, self.ball_vel_y)
+            self.p1_loki_split_pending = False
+            spd = math.hypot(self.ball_vel_x, self.ball_vel_y)
+            self.ball_vel_x, self.ball_vel_y = self.random_angle_vec(spd, toward_right=True)
+
+    def paddle_bounce_for_right(self, right_rect, now_ms):
+        # snap just outside paddle
+        self.ball_x = right_rect[0] - radius
+
+        # Meter: right player hit +1
+        self.p2_meter = min(METER_MAX, self.p2_meter + 1)
+        self.paddle_hits += 1
+
+        # outgoing to the left
+        self.ball_vel_x, self.ball_vel_y = self._deflect(
+            self.right_y, -1, self.p2_power == QUICKSILVER and now_ms < self.p2_qs_until_ms)
+
+        # ---- Character hooks ----
+        if self.p2_power == INVISIBLE_WOMAN and self.p2_invis_hide_pending:
+            self.ball_invisible = True
+            self.last_ball_x = self.ball_x
+            self.p2_invis_hide_pending = False
+
+        if self.p2_power == LOKI:
+            self.holo_left_active = True
+        self.holo_right_active = False
+
+        if self.p2_power == LOKI and self.p2_loki_split_pending:
+            self.spawn_loki_fake_balls(self.ball_x, self.ball_y, self.ball_vel_x, self.ball_vel_y)
+            self.p2_loki_split_pending = False
+            spd = math.hypot(self.ball_vel_x, self.ball_vel_y)
+            self.ball_vel_x, self.ball_vel_y = self.random_angle_vec(spd, toward_right=False)
+
+    # ---- input ----
+    def is_double_press(self, side, now_ms):
+        last = self.last_toward_press_ms[side]
+        self.last_toward_press_ms[side] = now_ms
+        return (now_ms - last) <= DOUBLE_PRESS_THRESHOLD
+
+    def press(self, side, button):
+        """Handle one key-down event for `side` ("left"/"right")."""
+        if self.state == STATE_OVER:
+            return
+        now_ms = self.clock.now_ms()
+
+        if self.state == STATE_SERVE and side == self.server and button in (BTN_UP, BTN_DOWN):
+            # Start rally when the server presses their paddle keys
+            self.ball_vel_x, self.ball_vel_y = self.serve_vx, self.serve_vy
+            self.ball_epoch = next(_ball_epochs)
+            self.state = STATE_PLAY
+            self.begin_rally(now_ms)
+
+        if button == BTN_TOWARD:
+            # Ability: double-press toward the midline with a full meter
+            if self.is_double_press(side, now_ms):
+                if side == "left" and self.p1_meter >= METER_MAX:
+                    self._activate_p1_ability(now_ms)
+                elif side == "right" and self.p2_meter >= METER_MAX:
+                    self._activate_p2_ability(now_ms)
+
+        elif button == BTN_AWAY and self.state == STATE_PLAY:
+            # Invisible Woman PASSIVE (freeze)
+            if side == "left" and self.p1_power == INVISIBLE_WOMAN and not self.p1_invis_passive_used:
+                self.freeze_right_until_ms = now_ms + INVIS_PASSIVE_MS
+                self.p1_invis_passive_used = True
+            if side == "right" and self.p2_power == INVISIBLE_WOMAN and not self.p2_invis_passive_used:
+                self.freeze_left_until_ms = now_ms + INVIS_PASSIVE_MS
+                self.p2_invis_passive_used = True
+
+    def _activate_p1_ability(self, now_ms):
+        self.p1_ability_uses += 1
+        self.p1_last_ability_ms = now_ms
+        self.p1_meter = 0
+        if self.p1_power == IRON_MAN:
+            self.p1_ability_until_ms = now_ms + IRON_ABILITY_MS
+        elif self.p1_power == LOKI:
+            # next hit will split ball
+            self.p1_loki_split_pending = True
+        elif self.p1_power == QUICKSILVER:
+            self.p1_qs_until_ms = now_ms + QUICKSILVER_ABILITY_MS
+            self.p2_qs_freeze_until_ms = now_ms + QUICKSILVER_FREEZE_MS
+        elif self.p1_power == INVISIBLE_WOMAN:
+            self.p1_invis_hide_pending = True
+
+    def _activate_p2_ability(self, now_ms):
+        self.p2_ability_uses += 1
+        self.p2_last_ability_ms = now_ms
+        self.p2_meter = 0
+        if self.p2_power == IRON_MAN:
+            self.p2_ability_until_ms = now_ms + IRON_ABILITY_MS
+        elif self.p2_power == LOKI:
+            self.p2_loki_split_pending = True
+        elif self.p2_power == QUICKSILVER:
+            self.p2_qs_until_ms = now_ms + QUICKSILVER_ABILITY_MS
+            self.p1_qs_freeze_until_ms = now_ms + QUICKSILVER_FREEZE_MS
+        elif self.p2_power == INVISIBLE_WOMAN:
+            self.p2_invis_hide_pending = True
+
+    # ---- per-frame update ----
+    def step(self, left_held=(), right_held=()):
+        """
+        Advance one frame. `left_held`/`right_held` are the buttons currently
+        held down by each side.
+        """
+        if self.state != STATE_OVER:
+            self._update(self.clock.now_ms(), left_held, right_held)
+        self.clock.advance()
+
+    def _update(self, now_ms, left_held, right_held):
+
+        left_frozen  = (now_ms < self.freeze_left_until_ms)
+        right_frozen = (now_ms < self.freeze_right_until_ms)
+
+        # Quicksilver 2s freeze phase (enemy paddle + real ball)
+        left_frozen  = left_frozen  or (now_ms < self.p1_qs_freeze_until_ms)
+        right_frozen = right_frozen or (now_ms < self.p2_qs_freeze_until_ms)
+        qs_ball_frozen = (now_ms < self.p1_qs_freeze_until_ms) or (now_ms < self.p2_qs_freeze_until_ms)
+
+        # --- Iron Man passive: horizontal nudge  ---
+        if self.p1_power == IRON_MAN and not left_frozen:
+            if BTN_TOWARD in left_held:
+                self.left_x_offset  += IRON_X_NUDGE_SPEED   # toward enemy (right)
+            if BTN_AWAY in left_held:
+                self.left_x_offset  -= IRON_X_NUDGE_SPEED   # away (left)
+
+        if self.p2_power == IRON_MAN and not right_frozen:
+            if BTN_TOWARD in right_held:
+                self.right_x_offset -= IRON_X_NUDGE_SPEED   # toward enemy (left)
+            if BTN_AWAY in right_held:
+                self.right_x_offset += IRON_X_NUDGE_SPEED   # away (right)
+
+        # --- Absolute horizontal clamps ---
+        left_min_x = 0
+        left_max_x = self.width // 2 - paddle_width - CENTER_MARGIN
+        new_left = self.left_x + self.left_x_offset
+        if new_left < left_min_x:
+            new_left = left_min_x
+        elif new_left > left_max_x:
+            new_left = left_max_x
+        self.left_x_offset = new_left - self.left_x
+
+        right_min_x = self.width // 2 + CENTER_MARGIN
+        right_max_x = self.width - paddle_width
+        new_right = self.right_x + self.right_x_offset
+        if new_right < right_min_x:
+            new_right = right_min_x
+        elif new_right > right_max_x:
+            new_right = right_max_x
+        self.right_x_offset = new_right - self.right_x
+
+        # standard vertical controls
+        left_dir  = (-1 if BTN_UP in left_held  else 0) + (1 if BTN_DOWN in left_held  else 0)
+        right_dir = (-1 if BTN_UP in right_held else 0) + (1 if BTN_DOWN in right_held else 0)
+        if left_frozen:  left_dir  = 0
+        if right_frozen: right_dir = 0
+
+        # ability-aware paddle speeds (Iron Man overrides; Quicksilver modifies base and enemy)
+        left_base  = PADDLE_SPEED + (QUICKSILVER_SPEED_BOOST if self.p1_power == QUICKSILVER else 0)
+        right_base = PADDLE_SPEED + (QUICKSILVER_SPEED_BOOST if self.p2_power == QUICKSILVER else 0)
+
+        left_speed  = IRON_ABILITY_SPEED if (self.p1_power == IRON_MAN and now_ms < self.p1_ability_until_ms) else left_base
+        right_speed = IRON_ABILITY_SPEED if (self.p2_power == IRON_MAN and now_ms < self.p2_ability_until_ms) else right_base
+
+        # Quicksilver ability halves the ENEMY paddle speed
+        p1_qs_active = self.p1_power == QUICKSILVER and now_ms < self.p1_qs_until_ms
+        p2_qs_active = self.p2_power == QUICKSILVER and now_ms < self.p2_qs_until_ms
+        if p1_qs_active:
+            right_speed *= 0.5
+        if p2_qs_active:
+            left_speed *= 0.5
+
+        # paddles
+        self.left_y  += left_dir  * left_speed
+        self.right_y += right_dir * right_speed
+        self.clamp_paddles_vertical()
+
+        if self.state != STATE_PLAY:
+            return
+
+        # Quick Silver movement; walls and paddles are swept along the way
+        qs_ball_factor = 0.5 if p1_qs_active or p2_qs_active else 1.0
+        self._move_ball(0.0 if qs_ball_frozen else qs_ball_factor, now_ms)
+
+        # Invisible woman invis-ball limits
+        if self.ball_invisible:
+            mid = self.width / 2
+            if (self.last_ball_x - mid) * (self.ball_x - mid) <= 0:
+                self.ball_invisible = False
+
+        # Loki Fake balls use same physics as real ball (and leave at the side lines);
+        # in multi-ball mode they bounce off the paddles too. Most frames have none.
+        if self.fake_balls:
+            if self.multiball:
+                self.fake_balls.step(self.width, self.height, self.collider_rects(now_ms))
+            else:
+                self.fake_balls.step(self.width, self.height)
+
+        # scoring -> go to SERVE
+        if self.ball_x + radius < 0:
+            # RIGHT scored
+            self.score_right += 1
+            self.p2_meter = min(METER_MAX, self.p2_meter + 1)
+            self.p1_meter = min(METER_MAX, self.p1_meter + 2)
+            self._end_rally("P2", now_ms)
+            self.reset_ball(right_scored=True)
+
+        elif self.ball_x - radius > self.width:
+            # LEFT scored
+            self.score_left += 1
+            self.p1_meter = min(METER_MAX, self.p1_meter + 1)
+            self.p2_meter = min(METER_MAX, self.p2_meter + 2)
+            self._end_rally("P1", now_ms)
+            self.reset_ball(right_scored=False)
+
+        else:
+            # Hologram paddles (Loki passive) follow the enemy paddle
+            if self.holo_right_active:
+                self.holo_right_y = self.mirror_y_of(self.right_y, "right")
+            if self.holo_left_active:
+                self.holo_left_y = self.mirror_y_of(self.left_y, "left")
+
+        if self.score_right >= self.points_to_win:
+            self.winner = "P2"
+            self.state = STATE_OVER
+        elif self.score_left >= self.points_to_win:
+            self.winner = "P1"
+            self.state = STATE_OVER
+
+    def _move_ball(self, scale, now_ms):
+        """
+        Move the real ball one frame (velocity * `scale`). Wall and paddle
+        contacts are found by time of impact and resolved in order, so a fast
+        ball cannot pass through a paddle and the hits do not depend on how
+        far the ball travels per step.
+        """
+        remaining = 1.0
+        for _ in range(MAX_SWEEP_EVENTS):
+            dx = self.ball_vel_x * scale * remaining
+            dy = self.ball_vel_y * scale * remaining
+            t = wall_time_of_impact(self.ball_y, dy, self.height)
+            hit = None if t is None else "wall"
+            # a paddle only counts while the ball is heading toward it (and can reach it);
+            # the rects are only built then, as the paddles do not move during the sweep
+            if self.ball_vel_x < 0 and self.ball_x + dx - radius <= int(self.left_x + self.left_x_offset) + paddle_width:
+                left_rect = self.paddle_rects()[0]
+                tp = rect_time_of_impact(self.ball_x, self.ball_y, dx, dy, left_rect)
+                if tp is not None and (t is None or tp < t):
+                    t, hit = tp, "left"
+            elif self.ball_vel_x > 0 and self.ball_x + dx + radius >= int(self.right_x + self.right_x_offset):
+                right_rect = self.paddle_rects()[1]
+                tp = rect_time_of_impact(self.ball_x, self.ball_y, dx, dy, right_rect)
+                if tp is not None and (t is None or tp < t):
+                    t, hit = tp, "right"
+            if hit is None:
+                self.ball_x += dx
+                self.ball_y += dy
+                return
+
+            self.ball_x += dx * t
+            remaining *= 1.0 - t
+            self.ball_epoch = next(_ball_epochs)
+            if hit == "wall":
+                # wall bounce dampens ball speed
+                self.ball_y = HUD_H + radius if dy < 0 else self.height - radius
+                self.ball_vel_y *= WALL_DAMPING
+            else:
+                self.ball_y += dy * t
+                if hit == "left":
+                    self.paddle_bounce_for_left(left_rect, now_ms)
+                else:
+                    self.paddle_bounce_for_right(right_rect, now_ms)
+
+    def _end_rally(self, winner, now_ms):
+        # capture end velocity BEFORE reset
+        row = self.rally_row(winner, self.ball_vel_x, self.ball_vel_y, now_ms)
+        if self.on_rally is not None:
+            self.on_rally(row)
@@ -0,0 +1,112 @@
+"""
+Match farm: fan headless matches out over a process pool and merge the rows.
+
+    python -m marvel_pong.farm --matches 50000 --workers 32 --engine batch
+
+Matches are split into shards of consecutive match numbers. Match i always
+uses seed ``seed + i`` (scalar engine), and a batch shard starting at match i
+always uses ``[seed, i]``. The merged dataset is therefore the same for any
+worker count, as long as the shards are: scalar rows do not depend on the
+shard size, but batch shards default to one per worker (up to
+``batch.DEFAULT_LANES`` matches each, so every BatchSim runs many lanes), so
+pass ``--shard-size`` to pin a batch dataset. Workers only return rows; the
+parent process is the only writer, appending shards in order to one new log
+file.
+"""
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from . import rally_log
+from .engine import POWER_NAMES
+from .headless import play_seeded_match
+
+ENGINES = ("scalar", "batch")
+
+
+def run_shard(shard):
+    """Worker entry point: play one shard, return (shard, pid, rows, seconds)."""
+    engine, start, count, seed, p1_power, p2_power = shard
+    t0 = time.perf_counter()
+    if engine == "batch":
+        from .batch import simulate_batch
+        rows = simulate_batch(count, p1_power, p2_power, seed=[seed, start])
+    else:
+        rows = []
+        for i in range(start, start + count):
+            rows.extend(play_seeded_match(seed + i, p1_power, p2_power))
+    return shard, os.getpid(), rows, time.perf_counter() - t0
+
+
+def make_shards(n_matches, shard_size, engine="scalar", seed=0, p1_power=None, p2_power=None):
+    return [(engine, start, min(shard_size, n_matches - start), seed, p1_power, p2_power)
+            for start in range(0, n_matches, shard_size)]
+
+
+def run_farm(n_matches, workers=None, engine="scalar", seed=0, out=None,
+             p1_power=None, p2_power=None, shard_size=None, report=print, columnar=False):
+    """
+    Play `n_matches` across `workers` processes (default: one per core) and
+    write every rally to `out` (default: a new match_log_* file; typed
+    columns with `columnar`, see ``marvel_pong.columnar``). Returns
+    ``(path, stats)`` where stats maps worker pid -> [rallies, busy seconds].
+    """
+    workers = workers or os.cpu_count() or 1
+    if shard_size is None:
+        if engine == "batch":
+            from .batch import DEFAULT_LANES
+            # one big shard per worker: a BatchSim only pays off with tens of thousands of lanes
+            shard_size = min(-(-n_matches // workers), DEFAULT_LANES)
+        else:
+            # ~4 shards per worker for load balance
+            shard_size = max(1, n_matches // (workers * 4))
+    shards = make_shards(n_matches, shard_size, engine, seed, p1_power, p2_power)
+
+    writer = rally_log.RallyWriter(out, flush_rows=None, flush_ms=None, columnar=columnar)
+    path = writer.path
+    stats = {}
+    t0 = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        # map() yields in shard order, so the merged file is deterministic
+        for shard, pid, rows, busy in pool.map(run_shard, shards):
+            writer.write_many(rows)
+            st = stats.setdefault(pid, [0, 0.0])
+            st[0] += len(rows)
+            st[1] += busy
+    writer.close()
+    wall = time.perf_counter() - t0
+
+    if report is not None:
+        total = sum(r for r, _ in stats.values())
+        for i, (pid, (rallies, busy)) in enumerate(sorted(stats.items())):
+            report(f"worker {i} (pid {pid}): {rallies} rallies in {busy:.2f}s "
+                   f"busy -> {rallies / busy if busy else 0.0:.0f} rallies/s")
+        report(f"{n_matches} matches, {total} rallies in {wall:.2f}s on {workers} workers "
+               f"({total / wall:.0f} rallies/s overall) -> {path}")
+    return path, stats
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Run headless Marvel Pong matches on every core.")
+    ap.add_argument("--matches", type=int, default=1000)
+    ap.add_argument("--workers", type=int, default=None, help="processes (default: one per core)")
+    ap.add_argument("--engine", choices=ENGINES, default="scalar")
+    ap.add_argument("--p1", choices=POWER_NAMES, help="P1 character (random per match if omitted)")
+    ap.add_argument("--p2", choices=POWER_NAMES, help="P2 character (random per match if omitted)")
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--shard-size", type=int, default=None, help="matches per task")
+    ap.add_argument("--out", default=None, help="output path (default: a new match_log_* file)")
+    ap.add_argument("--columnar", action="store_true",
+                    help="write typed columns (Parquet, or .npy shards without pyarrow)")
+    args = ap.parse_args(argv)
+    try:
+        rally_log.check_out_path(args.out, args.columnar)
+    except ValueError as e:
+        ap.error(str(e))
+    run_farm(args.matches, args.workers, args.engine, args.seed, args.out,
+             args.p1, args.p2, args.shard_size, columnar=args.columnar)
+
+
+if __name__ == "__main__":
+    main()
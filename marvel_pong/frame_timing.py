@@ -0,0 +1,130 @@
+"""
+Per-frame phase timing for the interactive game.
+
+Each rendered frame is cut into phases (events, physics, HUD ...) with
+``time.perf_counter_ns``; every phase duration goes into a log-linear
+histogram (HDR-style: fixed relative precision, constant-time record, fixed
+memory), so p50/p95/p99 can be read at any time without keeping samples.
+
+    timer = FrameTimer(enabled=True)
+    timer.begin_frame()
+    ... handle events ...;  timer.mark("events")
+    ... step physics ...;   timer.mark("physics")
+    timer.end_frame()
+    timer.write_percentiles("match.timings.csv", match=1)
+
+When ``enabled`` is false every call returns after one attribute check.
+"""
+import os
+from time import perf_counter_ns
+
+# Phases of a match frame, in the order the game loop marks them
+PHASES = ("events", "physics", "clear", "hud", "jarvis", "sprites", "present")
+FRAME = "frame"  # whole frame, begin_frame() to end_frame()
+
+PERCENTILES = (50, 95, 99)
+
+# Sub-buckets per power of two: values are kept to within 1/32 (~3%)
+SUB_BITS = 5
+_SUB = 1 << SUB_BITS
+# Enough buckets for 2**40 ns (~18 minutes)
+_BUCKETS = (40 - SUB_BITS) * _SUB + 2 * _SUB
+
+TIMINGS_FIELDS = ("match", "phase", "frames") + tuple(f"p{q}_us" for q in PERCENTILES) + ("max_us",)
+
+
+def bucket_index(ns):
+    """Histogram bucket of a duration in ns: exact below 64 ns, then 32 buckets per doubling."""
+    if ns < 2 * _SUB:
+        return ns
+    shift = ns.bit_length() - SUB_BITS - 1
+    return shift * _SUB + (ns >> shift)
+
+
+def bucket_value(index):
+    """Midpoint (ns) of the values that fall in bucket `index`."""
+    if index < 2 * _SUB:
+        return index
+    shift = index // _SUB - 1
+    low = (index - shift * _SUB) << shift
+    return low + ((1 << shift) >> 1)
+
+
+class Histogram:
+    """Counts of durations (ns) in log-linear buckets."""
+
+    def __init__(self):
+        self.counts = [0] * _BUCKETS
+        self.total = 0
+        self.max = 0
+
+    def record(self, ns):
+        i = bucket_index(ns)
+        if i >= _BUCKETS:
+            i = _BUCKETS - 1
+        self.counts[i] += 1
+        self.total += 1
+        if ns > self.max:
+            self.max = ns
+
+    def percentile(self, q):
+        """Approximate q-th percentile in ns (0 when empty)."""
+        if not self.total:
+            return 0
+        rank = max(1, -(-self.total * q // 100))  # ceil
+        seen = 0
+        for i, c in enumerate(self.counts):
+            seen += c
+            if seen >= rank:
+                return min(bucket_value(i), self.max)
+        return self.max
+
+
+class FrameTimer:
+    """
+    Phase timers for the frame loop. ``begin_frame`` starts the clock, each
+    ``mark(phase)`` charges the time since the previous mark to `phase`, and
+    ``end_frame`` records the whole frame. ``reset`` starts new histograms
+    (one set per match).
+    """
+
+    def __init__(self, phases=PHASES, enabled=False):
+        self.phases = tuple(phases) + (FRAME,)
+        self.enabled = enabled
+        self.reset()
+
+    def reset(self):
+        self.hist = {p: Histogram() for p in self.phases}
+        self.frames = 0
+        self.frame_start = self.last = perf_counter_ns()
+
+    def begin_frame(self):
+        if self.enabled:
+            self.frame_start = self.last = perf_counter_ns()
+
+    def mark(self, phase):
+        if self.enabled:
+            now = perf_counter_ns()
+            self.hist[phase].record(now - self.last)
+            self.last = now
+
+    def end_frame(self):
+        if self.enabled:
+            self.hist[FRAME].record(perf_counter_ns() - self.frame_start)
+            self.frames += 1
+
+    def percentiles(self, qs=PERCENTILES):
+        """{phase: [p(q) in ns for q in qs]} for the phases that were recorded."""
+        return {p: [h.percentile(q) for q in qs] for p, h in self.hist.items() if h.total}
+
+    def write_percentiles(self, path, match):
+        """Append one row per phase (percentiles in µs) for `match` to the CSV at `path`."""
+        new = not os.path.exists(path)
+        with open(path, "a", encoding="utf-8") as f:
+            if new:
+                f.write(",".join(TIMINGS_FIELDS) + "\n")
+            for phase, values in self.percentiles().items():
+                h = self.hist[phase]
+                cols = [str(match), phase, str(h.total)] + \
+                    [f"{ns / 1000:.1f}" for ns in values] + [f"{h.max / 1000:.1f}"]
+                f.write(",".join(cols) + "\n")
@@ -0,0 +1,144 @@
+"""
+On-demand profiling of the game loop for a chosen window: one rally, or the
+next N match frames. Menu time is never included.
+
+A spec is ``MODE[:WINDOW]``:
+
+- MODE ``cprofile``: deterministic profile, written as ``.pstats``
+  (``python -m pstats file`` or snakeviz).
+- MODE ``sample``: a background thread samples the main thread's stack
+  every `interval` seconds and writes collapsed stacks (``.collapsed``, one
+  ``frame;frame;frame count`` line per stack) for flamegraph.pl/speedscope.
+  Much lower overhead than cProfile.
+- WINDOW ``rally`` (default) or a frame count such as ``600``.
+
+Files are named after the session's rally log: ``match_log_..._m2_r5.pstats``
+(match 2, rally 5) or ``match_log_..._m1_w1.collapsed`` (first frame window).
+"""
+import cProfile
+import os
+import sys
+import threading
+import time
+
+CPROFILE = "cprofile"
+SAMPLE = "sample"
+MODES = (CPROFILE, SAMPLE)
+RALLY = "rally"
+
+SAMPLE_INTERVAL = 0.001
+DEFAULT_SPEC = "cprofile:rally"
+
+
+def parse_spec(spec):
+    """'MODE[:WINDOW]' -> (mode, RALLY or a frame count). Raises ValueError."""
+    mode, _, window = spec.partition(":")
+    if mode not in MODES:
+        raise ValueError(f"profile mode must be one of {', '.join(MODES)}, not {mode!r}")
+    window = window or RALLY
+    if window != RALLY:
+        window = int(window)
+        if window <= 0:
+            raise ValueError("profile window must be 'rally' or a positive frame count")
+    return mode, window
+
+
+class StackSampler:
+    """Collapsed-stack sampler for one thread (default: the calling thread)."""
+
+    def __init__(self, interval=SAMPLE_INTERVAL, thread_id=None):
+        self.interval = interval
+        self.thread_id = threading.get_ident() if thread_id is None else thread_id
+        self.counts = {}
+        self._stop = threading.Event()
+        self._thread = None
+
+    def enable(self):
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+        self._thread.start()
+
+    def disable(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        counts = self.counts
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                frame = frame.f_back
+            key = ";".join(reversed(stack))
+            counts[key] = counts.get(key, 0) + 1
+
+    def dump_stats(self, path):
+        with open(path, "w", encoding="utf-8") as f:
+            for stack, n in sorted(self.counts.items()):
+                f.write(f"{stack} {n}\n")
+
+
+class LoopProfiler:
+    """
+    Profile windows of the frame loop. ``arm()`` requests a window; the
+    loop calls ``update(playing, prefix, match_no, rally_index)`` once per
+    match frame, which starts an armed window (a rally window waits for the
+    serve) and ends it when the rally or frame count is over. ``stop()``
+    ends a window early, e.g. on leaving the match. With `repeat`, every
+    rally (or every `window` frames) gets its own file.
+    """
+
+    def __init__(self, mode=CPROFILE, window=RALLY, repeat=False, report=print):
+        self.mode = mode
+        self.window = window
+        self.repeat = repeat
+        self.report = report
+        self.armed = False
+        self.profiler = None
+        self.path = None
+        self.frames = 0
+        self.windows = 0
+
+    @classmethod
+    def from_spec(cls, spec, repeat=False, report=print):
+        mode, window = parse_spec(spec)
+        return cls(mode, window, repeat, report)
+
+    @property
+    def active(self):
+        return self.profiler is not None
+
+    def arm(self):
+        self.armed = True
+
+    def update(self, playing, prefix, match_no, rally_index):
+        if self.profiler is None:
+            if self.armed and (playing or self.window != RALLY):
+                self._start(prefix, match_no, rally_index)
+            return
+        self.frames += 1
+        done = not playing if self.window == RALLY else self.frames >= self.window
+        if done:
+            self.stop()
+
+    def _start(self, prefix, match_no, rally_index):
+        self.armed = self.repeat
+        self.windows += 1
+        label = f"m{match_no}_r{rally_index}" if self.window == RALLY else f"m{match_no}_w{self.windows}"
+        ext = ".pstats" if self.mode == CPROFILE else ".collapsed"
+        self.path = f"{prefix}_{label}{ext}"
+        self.frames = 0
+        self.profiler = cProfile.Profile() if self.mode == CPROFILE else StackSampler()
+        self.t0 = time.perf_counter()
+        self.profiler.enable()
+
+    def stop(self):
+        """End the current window (if any) and write its file."""
+        if self.profiler is None:
+            return
+        self.profiler.disable()
+        self.profiler.dump_stats(self.path)
+        self.profiler = None
+        self.report(f"profiled {self.frames} frames ({time.perf_counter() - self.t0:.1f}s) -> {self.path}")
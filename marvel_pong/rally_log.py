@@ -0,0 +1,248 @@
+"""
+Per-rally CSV log (one row per point).
+
+Rows come from ``Match.rally_row`` as typed tuples in ``RALLY_FIELDS`` order;
+``format_row`` turns them into the strings written to disk. ``RallyWriter``
+does the writing on a background thread so the frame loop never waits on disk.
+"""
+import atexit
+import csv
+import os
+import queue
+import threading
+import time
+
+RALLY_FIELDS = (
+    "rally_index",
+    "paddle_hits",
+    "end_ball_speed_px_per_frame",
+    "rally_duration_s",
+    "p1_ability_uses",
+    "p2_ability_uses",
+    "winner",
+    "p1_win_within_8s_after_ability",
+    "p2_win_within_8s_after_ability",
+)
+
+
+def new_log_filename(ext=".csv"):
+    return f"match_log_{time.strftime('%Y%m%d_%H%M%S')}{ext}"
+
+
+def claim_unique_log(directory, ext, create):
+    """
+    Call ``create(path)`` for match_log_YYYYMMDD_HHMMSS<ext> in `directory`,
+    then ``..._1<ext>``, ``..._2<ext>`` ... while it raises FileExistsError.
+    `create` must create its file exclusively; its result is returned.
+    """
+    base, ext = os.path.splitext(new_log_filename(ext))
+    n = 0
+    while True:
+        name = base + (f"_{n}" if n else "") + ext
+        try:
+            return create(os.path.join(directory, name))
+        except FileExistsError:
+            n += 1
+
+
+def create_unique_log(directory="."):
+    """
+    Create a fresh match_log_YYYYMMDD_HHMMSS.csv (with header) in `directory`
+    and return its path. The file is created exclusively, so two runs started
+    in the same second get ``..._1.csv``, ``..._2.csv`` instead of sharing one.
+    """
+    def create(path):
+        with open(path, "x", newline="", encoding="utf-8") as f:
+            csv.writer(f).writerow(RALLY_FIELDS)
+        return path
+    return claim_unique_log(directory, ".csv", create)
+
+
+def format_row(row):
+    """Typed rally row -> CSV strings (3-decimal floats, lowercase booleans)."""
+    (rally_index, paddle_hits, end_speed, duration_s,
+     p1_uses, p2_uses, winner, p1_win_within_8s, p2_win_within_8s) = row
+    return [
+        rally_index,
+        paddle_hits,
+        f"{end_speed:.3f}",
+        f"{duration_s:.3f}",
+        p1_uses,
+        p2_uses,
+        winner,
+        str(bool(p1_win_within_8s)).lower(),
+        str(bool(p2_win_within_8s)).lower(),
+    ]
+
+
+def create_log(path):
+    """Create `path` with the header row unless it already exists."""
+    if not os.path.exists(path):
+        with open(path, "w", newline="", encoding="utf-8") as f:
+            csv.writer(f).writerow(RALLY_FIELDS)
+    return path
+
+
+def check_out_path(path, columnar=False):
+    """
+    Raise ValueError if rally logs of this kind cannot go to `path` (None:
+    a new match_log_* file, always fine). CSV logs are appended to, so an
+    existing CSV is fine; columnar logs must go to a new ``.parquet`` path.
+    """
+    if path is None:
+        return
+    if columnar:
+        from .columnar import check_path
+        check_path(path)
+    elif os.path.splitext(path)[1].lower() == ".parquet":
+        raise ValueError(f"{path!r} is a Parquet path: add --columnar or write to a .csv")
+
+
+class CsvSink:
+    """Rows -> one open CSV file (the sink interface RallyWriter writes through)."""
+
+    def __init__(self, path):
+        self.path = create_log(path)
+        self.file = open(path, "a", newline="", encoding="utf-8")
+        self.writer = csv.writer(self.file)
+
+    def write(self, row):
+        self.writer.writerow(format_row(row))
+
+    def write_many(self, rows):
+        self.writer.writerows(format_row(row) for row in rows)
+
+    def flush(self):
+        self.file.flush()
+
+    def sync(self):
+        self.file.flush()
+        os.fsync(self.file.fileno())
+
+    def close(self):
+        self.sync()
+        self.file.close()
+
+
+class RallyWriter:
+    """
+    Appends rally rows to `path` (default: a new match_log_* in the current
+    directory) from a background thread.
+
+    ``write(row)`` only puts the row on a bounded queue (it blocks if the
+    writer falls `max_queue` items behind). Rows go to a CSV file, or with
+    ``columnar=True`` to typed columns (see ``marvel_pong.columnar``), and
+    are handed to the OS according to the durability policy:
+
+    - `flush_rows`: flush after this many rows (None: no row limit)
+    - `flush_ms`: flush once a written row is this old (None: no time limit)
+    - `fsync_at_match_end`: ``end_match()`` also fsyncs the file
+
+    ``close()`` drains the queue, flushes and fsyncs. It is registered with
+    atexit, so ``sys.exit()`` does not lose queued rows.
+    """
+
+    _CLOSE = object()
+
+    def __init__(self, path=None, flush_rows=64, flush_ms=1000, fsync_at_match_end=True,
+                 max_queue=4096, columnar=False):
+        check_out_path(path, columnar)
+        if columnar:
+            from .columnar import ColumnarSink  # needs NumPy; CSV logging does not
+            self.sink = (ColumnarSink(path) if path else
+                         claim_unique_log(".", ".parquet", ColumnarSink))
+        else:
+            self.sink = CsvSink(path or create_unique_log())
+        self.path = self.sink.path
+        self.flush_rows = flush_rows
+        self.flush_ms = flush_ms
+        self.fsync_at_match_end = fsync_at_match_end
+        self.error = None
+        self._queue = queue.Queue(max_queue)
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="rally-writer", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def write(self, row):
+        """Queue one typed rally row (usable directly as ``Match(on_rally=...)``)."""
+        self._queue.put(row)
+
+    def write_many(self, rows):
+        """Queue a list of rows as one item."""
+        self._queue.put(list(rows))
+
+    def end_match(self, wait=False):
+        """Flush (and fsync, per policy) everything written so far."""
+        done = threading.Event()
+        self._queue.put(done)
+        if wait:
+            done.wait()
+
+    def close(self):
+        """Write every queued row, flush, fsync and stop the thread."""
+        if self._closed:
+            return
+        self._closed = True
+        atexit.unregister(self.close)
+        if self._thread.is_alive():
+            self._queue.put(self._CLOSE)
+            self._thread.join()
+        if self.error is not None:
+            raise self.error
+
+    def _run(self):
+        try:
+            self._drain(self.sink)
+        except Exception as exc:  # surfaced by close()
+            self.error = exc
+            # keep taking rows so write() never blocks on a dead thread
+            while True:
+                item = self._queue.get()
+                if item is self._CLOSE:
+                    return
+                if isinstance(item, threading.Event):
+                    item.set()
+
+    def _drain(self, sink):
+        # the sink is closed however the loop ends, so a failed write still leaves a closed file
+        try:
+            self._drain_until_close(sink)
+        finally:
+            sink.close()
+
+    def _drain_until_close(self, sink):
+        timeout = None if self.flush_ms is None else self.flush_ms / 1000.0
+        pending = 0
+        oldest = 0.0
+        while True:
+            try:
+                item = self._queue.get(timeout=timeout if pending else None)
+            except queue.Empty:
+                item = None
+
+            if item is self._CLOSE:
+                return
+            if isinstance(item, threading.Event):
+                if self.fsync_at_match_end:
+                    sink.sync()
+                else:
+                    sink.flush()
+                pending = 0
+                item.set()
+                continue
+
+            if item is not None:
+                if not pending:
+                    oldest = time.monotonic()
+                if isinstance(item, list):
+                    sink.write_many(item)
+                    pending += len(item)
+                else:
+                    sink.write(item)
+                    pending += 1
+            if pending and ((self.flush_rows is not None and pending >= self.flush_rows) or
+                            (self.flush_ms is not None and
+                             (time.monotonic() - oldest) * 1000.0 >= self.flush_ms)):
+                sink.flush()
+                pending = 0
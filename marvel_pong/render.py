@@ -0,0 +1,460 @@
+"""
+Pygame drawing helpers shared by the game's screens: colors, fonts loaded
+by path, cached text rendering and wrapping, baked paddle skins, the Jarvis
+dotted trajectory and the HUD meter bars.
+
+Importing this module imports pygame but initialises nothing; fonts need
+``pygame.font.init()`` and surfaces need a display mode before use.
+"""
+import os
+from itertools import repeat
+
+import pygame
+
+from .engine import paddle_height, paddle_width
+
+BLUE   = (0, 0, 255)
+RED    = (255, 0, 0)
+GREEN  = (0, 255, 0)
+BLACK  = (0, 0, 0)
+WHITE  = (255, 255, 255)
+LIGHT_BLUE = (135, 206, 250)
+YELLOW = (255, 215, 0)
+HUD_BG = (20, 20, 20)
+HUD_BORDER = (80, 80, 80)
+JARVIS_COLOR = (80, 180, 255)
+
+# Fonts are loaded by path from assets/fonts; SysFont would scan every installed font.
+# Without a bundled file the installed font is looked up once (match_font) instead.
+FONT_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "assets", "fonts")
+FONT_FILES = {("calibri", False): "calibri.ttf", ("calibri", True): "calibrib.ttf"}
+FONT_CACHE = {}  # (family, size, bold) -> Font, ("path", family, bold) -> TTF path or None
+
+
+def font_path(family, bold=False):
+    """
+    TTF of `family`: the bundled file in assets/fonts, else the installed
+    font that pygame.font.match_font() finds, else None. Cached, so the
+    system fonts are searched at most once per (family, bold).
+    """
+    key = ("path", family, bold)
+    if key not in FONT_CACHE:
+        path = os.path.join(FONT_DIR, FONT_FILES.get((family, bold), ""))
+        FONT_CACHE[key] = path if os.path.isfile(path) else pygame.font.match_font(family, bold=bold)
+    return FONT_CACHE[key]
+
+
+def load_font(family, size, bold=False):
+    """
+    Font `family` from its TTF (see font_path), cached per (family, size,
+    bold). Without a bold face the regular one is emboldened; without any
+    file it is pygame's built-in font, as with SysFont.
+    """
+    key = (family, size, bold)
+    font = FONT_CACHE.get(key)
+    if font is None:
+        path = font_path(family, bold)
+        regular = font_path(family) if bold else path
+        font = pygame.font.Font(path or regular, size)
+        if bold and path in (None, regular):
+            font.set_bold(True)  # synthesized bold
+        FONT_CACHE[key] = font
+    return font
+
+
+# Rendered text keyed by (text, font, color) and wrapped-paragraph layouts keyed
+# by (text, font, color, box size, spacing, indents, alignment); see render_text()
+# and draw_wrapped_text(); see clear_text_caches().
+TEXT_CACHE = {}
+LAYOUT_CACHE = {}
+
+
+def clear_text_caches():
+    """Drop cached text and layouts (window resized)."""
+    TEXT_CACHE.clear()
+    LAYOUT_CACHE.clear()
+
+
+def render_text(font, text, color):
+    """font.render(text, True, color), rendered once and then reused."""
+    key = (text, font, color)
+    surf = TEXT_CACHE.get(key)
+    if surf is None:
+        surf = TEXT_CACHE[key] = font.render(text, True, color)
+    return surf
+
+
+def draw_wrapped_text(surface, text, font, color, rect,
+                      line_spacing_px=0,
+                      paragraph_spacing_px=None,
+                      first_line_indent_px=24,
+                      subsequent_indent_px=0,
+                      v_align='top'):
+    """
+    Paragraph-aware text drawing with optional vertical centering and first-line indents.
+    Paragraphs split on '\n\n'. The wrapped, rendered lines are cached, so
+    redrawing the same text in a box of the same size is one blit per line.
+    """
+    key = (text, font, color, rect.size, line_spacing_px, paragraph_spacing_px,
+           first_line_indent_px, subsequent_indent_px, v_align)
+    layout = LAYOUT_CACHE.get(key)
+    if layout is None:
+        layout = LAYOUT_CACHE[key] = layout_wrapped_text(
+            text, font, color, rect, line_spacing_px, paragraph_spacing_px,
+            first_line_indent_px, subsequent_indent_px, v_align)
+    lines, end_y = layout
+    for surf, dx, dy in lines:
+        surface.blit(surf, (rect.x + dx, rect.y + dy))
+    return rect.y + end_y
+
+
+def layout_wrapped_text(text, font, color, rect, line_spacing_px, paragraph_spacing_px,
+                        first_line_indent_px, subsequent_indent_px, v_align):
+    """Wrap and render `text` for draw_wrapped_text: ([(surface, dx, dy)], end dy)."""
+    paragraphs = [p.strip() for p in text.split("\n\n")]
+    if not paragraphs:
+        return [], 0
+
+    if paragraph_spacing_px is None:
+        paragraph_spacing_px = font.get_linesize()
+
+    max_w = rect.w
+    line_h = font.get_linesize()
+
+    wrapped_lines = []
+    for para in paragraphs:
+        words = para.split()
+        if not words:
+            wrapped_lines.append(("", first_line_indent_px))
+            wrapped_lines.append((None, paragraph_spacing_px))
+            continue
+
+        indent_first  = first_line_indent_px
+        indent_follow = subsequent_indent_px
+
+        line = ""
+        indent = indent_first
+        for w in words:
+            candidate = (line + " " + w).strip()
+            if font.size(candidate)[0] <= max_w - indent:
+                line = candidate
+            else:
+                wrapped_lines.append((line, indent))
+                line = w
+                indent = indent_follow
+        if line:
+            wrapped_lines.append((line, indent))
+        wrapped_lines.append((None, paragraph_spacing_px))
+
+    if wrapped_lines and wrapped_lines[-1][0] is None:
+        wrapped_lines.pop()
+
+    total_height = 0
+    for text_line, indent in wrapped_lines:
+        if text_line is None:
+            total_height += indent
+        else:
+            total_height += line_h + line_spacing_px
+
+    if v_align == 'middle':
+        y = max(0, (rect.h - total_height) // 2)
+    else:
+        y = 0
+
+    lines = []
+    for text_line, indent in wrapped_lines:
+        if text_line is None:
+            y += indent
+            continue
+        lines.append((font.render(text_line, True, color), indent, y))
+        y += line_h + line_spacing_px
+
+    return lines, y
+
+
+def polyline_bounds(points, width=2):
+    """Rect covering a polyline drawn with lines `width` px wide."""
+    xs = [int(x) for x, _ in points]
+    ys = [int(y) for _, y in points]
+    return pygame.Rect(min(xs), min(ys), max(xs) - min(xs) + 1,
+                       max(ys) - min(ys) + 1).inflate(2 * width, 2 * width)
+
+
+# Baked dotted paths keyed by (points, style): re-baked only when the points change
+DOTTED_CACHE = {}
+DOTTED_CACHE_SIZE = 8
+
+
+def bake_dotted_polyline(points, color, dot_len=6, gap_len=6, width=2):
+    """
+    Draw a dotted polyline once onto its own transparent Surface, for paths
+    that stay put over many frames. Returns (surface, Rect on screen), or
+    (None, None) for fewer than two points. The last few paths are cached,
+    so a path is only drawn again when its points change.
+    """
+    if len(points) < 2:
+        return None, None
+    key = (tuple(points), color, dot_len, gap_len, width)
+    baked = DOTTED_CACHE.get(key)
+    if baked is None:
+        bounds = polyline_bounds(points, width)
+        surf = _keyed_surface(bounds.size, color)
+        draw_dotted_polyline(surf, [(x - bounds.x, y - bounds.y) for x, y in points],
+                             color, dot_len, gap_len, width)
+        # run-length encoded: encoding costs ~1 ms once, then each blit is ~20x cheaper
+        surf.set_colorkey(surf.get_colorkey(), pygame.RLEACCEL)
+        if len(DOTTED_CACHE) >= DOTTED_CACHE_SIZE:
+            del DOTTED_CACHE[next(iter(DOTTED_CACHE))]  # oldest
+        baked = DOTTED_CACHE[key] = (surf, bounds)
+    return baked
+
+
+def _keyed_surface(size, color):
+    """Blank Surface whose colorkey is a colour other than `color` (much faster to blit than per-pixel alpha)."""
+    key = BLACK if color != BLACK else WHITE
+    surf = pygame.Surface(size)  # starts out black
+    if key != BLACK:
+        surf.fill(key)
+    surf.set_colorkey(key)
+    return surf
+
+
+def dash_segments(points, dot_len=6, gap_len=6):
+    """
+    Every dash of a dotted polyline, in one vectorized pass. The pattern
+    restarts at each vertex and a dash running past a segment's end is cut
+    there. Returns (seg, start, end): the segment index of each dash and
+    (n, 2) float arrays of its endpoints.
+    """
+    import numpy as np  # first Jarvis path only; keeps numpy out of startup
+
+    p = np.asarray(points, dtype=np.float64)
+    d = np.diff(p, axis=0)
+    length = np.hypot(d[:, 0], d[:, 1])
+    period = float(dot_len + gap_len)
+    counts = np.ceil(length / period).astype(np.intp)  # dashes start at 0, period, ... < length
+    seg = np.repeat(np.arange(len(length)), counts)
+    t0 = (np.arange(len(seg)) - (np.cumsum(counts) - counts)[seg]) * period
+    t1 = np.minimum(t0 + dot_len, length[seg])
+    u = d[seg] / length[seg, None]  # segments of length 0 have no dashes
+    return seg, p[seg] + u * t0[:, None], p[seg] + u * t1[:, None]
+
+
+def draw_dotted_polyline(surface, points, color, dot_len=6, gap_len=6, width=2):
+    """
+    Draw dotted polyline along the given points list; returns its bounding Rect.
+
+    The full-length dashes of one segment are all the same line, so each
+    segment draws one dash sprite and stamps it everywhere with a single
+    ``Surface.blits`` call; only the cut dash at a segment's end is drawn
+    as a line.
+    """
+    if len(points) < 2:
+        return None
+    seg, start, end = dash_segments(points, dot_len, gap_len)
+    delta = end - start
+    cut = (delta[:, 0] ** 2 + delta[:, 1] ** 2) < dot_len * dot_len - 1e-6
+    x0y0 = start.astype(int)  # truncated like the per-dash int() casts
+    for i in range(len(points) - 1):
+        on_seg = seg == i
+        whole = on_seg & ~cut
+        if whole.any():
+            # one dash drawn on a padded sprite, offset so (ox, oy) is its start
+            dx, dy = (int(round(v)) for v in delta[whole.argmax()])
+            ox, oy = width - min(dx, 0), width - min(dy, 0)
+            dash = _keyed_surface((abs(dx) + 2 * width + 1, abs(dy) + 2 * width + 1), color)
+            pygame.draw.line(dash, color, (ox, oy), (ox + dx, oy + dy), width)
+            dests = (x0y0[whole] - (ox, oy)).tolist()
+            surface.blits(zip(repeat(dash), dests), doreturn=False)
+        for j in (on_seg & cut).nonzero()[0]:
+            (sx, sy), (ex, ey) = start[j], end[j]
+            pygame.draw.line(surface, color, (int(sx), int(sy)), (int(ex), int(ey)), width)
+    return polyline_bounds(points, width)
+
+
+# Ball sprites keyed by (color, radius); see blit_balls()
+BALL_SPRITES = {}
+
+
+def blit_balls(surface, centers, color, r):
+    """
+    Draw a ball of radius `r` centred on every row of `centers` (an (n, 2)
+    array) with a single Surface.blits call; returns the Rects covered.
+    """
+    sprite = BALL_SPRITES.get((color, r))
+    if sprite is None:
+        sprite = BALL_SPRITES[(color, r)] = _keyed_surface((2 * r + 1, 2 * r + 1), color)
+        pygame.draw.circle(sprite, color, (r, r), r)
+    dests = (centers.astype(int) - r).tolist()  # truncated like int() per ball
+    return surface.blits(zip(repeat(sprite), dests))
+
+
+# Baked paddle skins keyed by (power, side, (w, h), alpha); see paddle_skin()
+PADDLE_SKINS = {}
+# Transparent margin around each baked skin so Loki's horns (14 px) fit outside the rect
+SKIN_PAD = 16
+
+
+def draw_paddle(surface, rect, power_name, side):
+    """
+    Draws a paddle with a character-specific skin.
+    side: "left" or "right".
+    """
+    # default fallback coloring
+    base = RED if side == "left" else GREEN
+
+    if power_name == "Iron Man":
+        # Red body
+        pygame.draw.rect(surface, RED, rect)
+        # Arc reactor: yellow ring + blue core, centered
+        cx, cy = rect.center
+        outer_r = max(6, rect.w // 2 - 2)
+        inner_r = max(3, int(outer_r * 0.55))
+        pygame.draw.circle(surface, YELLOW, (cx, cy), outer_r)
+        pygame.draw.circle(surface, BLUE,   (cx, cy), inner_r)
+        pygame.draw.rect(surface, WHITE, rect, 1)
+        return
+
+    if power_name == "Loki":
+        # Dark green body
+        body = (20, 90, 50)
+        pygame.draw.rect(surface, body, rect)
+    
+        # Face line near the edge facing center
+        face_edge_x = rect.right if side == "left" else rect.left
+        line_x = face_edge_x - 3 if side == "left" else face_edge_x + 3
+        pygame.draw.line(surface, YELLOW, (line_x, rect.top + 6), (line_x, rect.bottom - 6), 3)
+    
+        # Horns OUTSIDE the paddle, pointing toward the center
+        horn_len = 14
+        horn_th  = 7
+        if side == "left":
+            # center to the right → horns extend out to the right
+            top_base = (rect.right, rect.top + 8)
+            bot_base = (rect.right, rect.bottom - 8)
+            tri_top = [
+                (top_base[0] + horn_len, top_base[1]),  # tip toward center
+                (top_base[0] + 2,        top_base[1] - horn_th),
+                (top_base[0] + 2,        top_base[1] + horn_th),
+            ]
+            tri_bot = [
+                (bot_base[0] + horn_len, bot_base[1]),
+                (bot_base[0] + 2,        bot_base[1] - horn_th),
+                (bot_base[0] + 2,        bot_base[1] + horn_th),
+            ]
+        else:
+            # center to the left → horns extend out to the left
+            top_base = (rect.left, rect.top + 8)
+            bot_base = (rect.left, rect.bottom - 8)
+            tri_top = [
+                (top_base[0] - horn_len, top_base[1]),  # tip toward center
+                (top_base[0] - 2,        top_base[1] - horn_th),
+                (top_base[0] - 2,        top_base[1] + horn_th),
+            ]
+            tri_bot = [
+                (bot_base[0] - horn_len, bot_base[1]),
+                (bot_base[0] - 2,        bot_base[1] - horn_th),
+                (bot_base[0] - 2,        bot_base[1] + horn_th),
+            ]
+    
+        pygame.draw.polygon(surface, YELLOW, tri_top)
+        pygame.draw.polygon(surface, YELLOW, tri_bot)
+    
+        pygame.draw.rect(surface, WHITE, rect, 1)
+        return
+
+    if power_name == "Invisible Woman":
+        # Light blue body with a white "4" centered
+        pygame.draw.rect(surface, LIGHT_BLUE, rect)
+        # Draw a bold white "4" in the center (size depends on rect)
+        fs = max(12, int(rect.h * 0.4))
+        font4 = load_font('calibri', fs, bold=True)
+        t4 = font4.render("4", True, WHITE)
+        surface.blit(t4, (rect.centerx - t4.get_width() // 2,
+                          rect.centery - t4.get_height() // 2))
+        pygame.draw.rect(surface, WHITE, rect, 1)
+        return
+
+    if power_name == "QuickSilver":
+        # Light blue paddle with a whitish-gray lightning bolt
+        pygame.draw.rect(surface, LIGHT_BLUE, rect)
+
+        w, h = rect.w, rect.h
+        x0, y0 = rect.x, rect.y
+        bolt = [
+            (x0 + int(0.22*w), y0 + int(0.06*h)),
+            (x0 + int(0.58*w), y0 + int(0.06*h)),
+            (x0 + int(0.42*w), y0 + int(0.46*h)),
+            (x0 + int(0.76*w), y0 + int(0.46*h)),
+            (x0 + int(0.30*w), y0 + int(0.94*h)),
+            (x0 + int(0.46*w), y0 + int(0.54*h)),
+            (x0 + int(0.22*w), y0 + int(0.54*h)),
+        ]
+        pygame.draw.polygon(surface, (150, 150, 150), bolt)  # whitish-gray
+        pygame.draw.rect(surface, WHITE, rect, 1)
+        return
+    
+    # Default (no skin yet)
+    pygame.draw.rect(surface, base, rect)
+
+
+def paddle_skin(power_name, side, size=(paddle_width, paddle_height), alpha=None):
+    """Skin drawn once onto its own padded Surface, then reused for every blit."""
+    key = (power_name, side, size, alpha)
+    surf = PADDLE_SKINS.get(key)
+    if surf is None:
+        w, h = size
+        surf = pygame.Surface((w + 2 * SKIN_PAD, h + 2 * SKIN_PAD), pygame.SRCALPHA)
+        draw_paddle(surf, pygame.Rect(SKIN_PAD, SKIN_PAD, w, h), power_name, side)
+        if alpha is not None:
+            surf.set_alpha(alpha)
+        PADDLE_SKINS[key] = surf
+    return surf
+
+
+def blit_paddle(surface, rect, power_name, side, alpha=None):
+    """Draw a paddle skin at `rect` with a single blit; returns the Rect covered."""
+    return surface.blit(paddle_skin(power_name, side, rect.size, alpha), (rect.x - SKIN_PAD, rect.y - SKIN_PAD))
+
+
+def draw_meter_bar(surface, x, y, value, maxv, seg_w=16, seg_h=18, gap=4,
+                   fill_color=(255, 215, 0), empty_color=(70, 70, 40), border_color=(120,120,120)):
+    """Draws a segmented meter bar (0..maxv)."""
+    r = pygame.Rect(x, y, seg_w, seg_h)  # one Rect moved along the bar
+    for i in range(maxv):
+        r.x = x + i*(seg_w+gap)
+        if i < value:
+            pygame.draw.rect(surface, fill_color, r, border_radius=3)
+        else:
+            pygame.draw.rect(surface, empty_color, r, border_radius=3)
+            pygame.draw.rect(surface, border_color, r, 1, border_radius=3)
+
+
+class DirtyRects:
+    """
+    The screen areas drawn in one frame, clipped to `bounds` (a Rect that
+    may change later, e.g. on resize). The Rects are pooled: ``clear()``
+    hands them back and ``add(rect)`` copies into one, so a steady frame
+    loop allocates none.
+    """
+
+    def __init__(self, bounds):
+        self.bounds = bounds
+        self.rects = []
+        self._free = []
+
+    def clear(self):
+        self._free.extend(self.rects)
+        self.rects.clear()
+
+    def add(self, rect):
+        b = self.bounds
+        left   = rect.left   if rect.left   > b.left   else b.left
+        top    = rect.top    if rect.top    > b.top    else b.top
+        right  = rect.right  if rect.right  < b.right  else b.right
+        bottom = rect.bottom if rect.bottom < b.bottom else b.bottom
+        if right <= left or bottom <= top:
+            return
+        r = self._free.pop() if self._free else pygame.Rect(0, 0, 0, 0)
+        r.update(left, top, right - left, bottom - top)
+        self.rects.append(r)
@@ -0,0 +1,195 @@
+"""
+Input recording and bit-exact replay.
+
+A match is fully determined by its characters, its RNG seed, the playfield
+size and what the players did on every physics step. ``InputRecorder``
+drives a ``Match`` (press / resize / step) and writes exactly that to a small
+text log; ``replay`` re-simulates the log with no window and no frame cap,
+producing the same rally rows (and telemetry) as the session that recorded it.
+
+    python -m marvel_pong.replay match_log_20250101_120000.inputs --out rallies.csv
+
+Log format, one line per entry::
+
+    match {"p1": "Loki", "p2": "QuickSilver", "seed": 123, "width": 1200, ...}
+    <held>[ <event> ...]      one line per step
+    end {"score": [5, 3], "steps": 4210}
+
+`held` is a hex bitmask of the buttons held on that step (bits 0-3 left,
+4-7 right, in ``BUTTONS`` order). Events are applied before the step in the
+order they happened: ``L<i>``/``R<i>`` is a key-down of ``BUTTONS[i]`` and
+``W<w>x<h>`` a window resize.
+"""
+import argparse
+import atexit
+import json
+import random
+import time
+
+from . import rally_log
+from .engine import BTN_AWAY, BTN_DOWN, BTN_TOWARD, BTN_UP, LOKI_ILLUSIONS, STATE_OVER, Match
+
+BUTTONS = (BTN_UP, BTN_DOWN, BTN_TOWARD, BTN_AWAY)
+_BIT = {b: 1 << i for i, b in enumerate(BUTTONS)}
+_SIDE_TAG = {"left": "L", "right": "R"}
+# step line for each held mask when there are no events (the common case), built once
+_HELD_LINES = [f"{m:x}\n" for m in range(256)]
+
+
+def new_seed():
+    """A fresh per-match seed for interactive play (recorded so it can be replayed)."""
+    return random.randrange(2 ** 63)
+
+
+class InputRecorder:
+    """
+    Drive the current match through ``press``/``resize``/``step`` and log
+    every input to `path`. Several matches can share one log. ``close()``
+    is also registered with atexit, so a match cut short still gets its end line.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.file = open(path, "w", encoding="utf-8")
+        self.match = None
+        self.events = []
+        self.steps = 0
+        atexit.register(self.close)
+
+    def begin_match(self, match, seed):
+        """Start logging `match`, which must have been created with `seed`."""
+        self.match = match
+        self.events = []
+        self.steps = 0
+        header = {"p1": match.p1_power, "p2": match.p2_power, "seed": seed,
+                  "width": match.width, "height": match.height,
+                  "points_to_win": match.points_to_win, "loki_illusions": match.loki_illusions,
+                  "multiball": match.multiball}
+        self.file.write("match " + json.dumps(header) + "\n")
+
+    def press(self, side, button):
+        if self.match is None:
+            return
+        self.events.append(f"{_SIDE_TAG[side]}{BUTTONS.index(button)}")
+        self.match.press(side, button)
+
+    def resize(self, new_w, new_h):
+        if self.match is None:
+            return
+        self.events.append(f"W{int(new_w)}x{int(new_h)}")
+        self.match.resize(new_w, new_h)
+
+    def step(self, left_held=(), right_held=()):
+        held = 0
+        for b in left_held:
+            held |= _BIT[b]
+        for b in right_held:
+            held |= _BIT[b] << 4
+        if self.events:
+            self.file.write(f"{held:x} {' '.join(self.events)}\n")
+            self.events.clear()
+        else:
+            self.file.write(_HELD_LINES[held])
+        self.steps += 1
+        self.match.step(left_held, right_held)
+        if self.match.state == STATE_OVER:
+            self.end_match()
+
+    def end_match(self):
+        """Close the current match's entry (also done automatically when it is won)."""
+        if self.match is None:
+            return
+        m = self.match
+        self.file.write("end " + json.dumps({"score": [m.score_left, m.score_right],
+                                             "steps": self.steps}) + "\n")
+        self.file.flush()
+        self.match = None
+
+    def close(self):
+        if self.file.closed:
+            return
+        atexit.unregister(self.close)
+        self.end_match()
+        self.file.close()
+
+
+def _held(mask, shift):
+    return [b for b in BUTTONS if mask & (_BIT[b] << shift)]
+
+
+def replay(path, telemetry=None):
+    """
+    Re-simulate every match in the input log at `path` and return the rally
+    rows. Raises ValueError if a match does not end with the recorded score
+    and step count.
+    """
+    rows = []
+    # decoded held lists, shared between steps with the same mask
+    held_cache = {m: (_held(m, 0), _held(m, 4)) for m in range(256)}
+    match = None
+    steps = 0
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if line.startswith("match "):
+                h = json.loads(line[6:])
+                match = Match(h["p1"], h["p2"], seed=h["seed"], width=h["width"],
+                              height=h["height"], on_rally=rows.append,
+                              points_to_win=h["points_to_win"],
+                              loki_illusions=h.get("loki_illusions", LOKI_ILLUSIONS),
+                              multiball=h.get("multiball"))
+                steps = 0
+                if telemetry is not None:
+                    telemetry.begin_match()
+            elif line.startswith("end "):
+                e = json.loads(line[4:])
+                if [match.score_left, match.score_right] != e["score"] or steps != e["steps"]:
+                    raise ValueError(f"{path}: replay diverged (score {match.score_left}:"
+                                     f"{match.score_right} after {steps} steps, recorded "
+                                     f"{e['score'][0]}:{e['score'][1]} after {e['steps']})")
+                match = None
+            elif match is not None:
+                parts = line.split()
+                for ev in parts[1:]:
+                    if ev[0] == "W":
+                        w, h = ev[1:].split("x")
+                        match.resize(int(w), int(h))
+                    else:
+                        match.press("left" if ev[0] == "L" else "right", BUTTONS[int(ev[1:])])
+                left_held, right_held = held_cache[int(parts[0], 16)]
+                match.step(left_held, right_held)
+                steps += 1
+                if telemetry is not None:
+                    telemetry.record(match)
+    return rows
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Re-simulate recorded Marvel Pong matches.")
+    ap.add_argument("inputs", help="match_log_*.inputs file written by the game")
+    ap.add_argument("--out", default=None, help="output path (default: a new match_log_* file)")
+    ap.add_argument("--columnar", action="store_true",
+                    help="write typed columns (Parquet, or .npy shards without pyarrow)")
+    ap.add_argument("--telemetry", default=None, help="also record every frame to this file")
+    args = ap.parse_args(argv)
+    try:
+        rally_log.check_out_path(args.out, args.columnar)
+    except ValueError as e:
+        ap.error(str(e))
+
+    writer = rally_log.RallyWriter(args.out, flush_rows=None, flush_ms=None, columnar=args.columnar)
+    telemetry = None
+    if args.telemetry:
+        from .telemetry import TelemetryRecorder
+        telemetry = TelemetryRecorder(args.telemetry)
+    t0 = time.perf_counter()
+    rows = replay(args.inputs, telemetry=telemetry)
+    writer.write_many(rows)
+    writer.close()
+    if telemetry is not None:
+        telemetry.close()
+    dt = time.perf_counter() - t0
+    print(f"{len(rows)} rallies replayed in {dt:.2f}s -> {writer.path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,43 @@
+"""
+The log files of one interactive play session, all sharing one
+``match_log_YYYYMMDD_HHMMSS`` stem: the rally CSV (``rally_log``), per-frame
+telemetry (``.frames``), the replayable input log (``.inputs``) and, when
+frame timing is on, per-match phase timings (``.timings.csv``).
+
+Nothing is created until ``open()``, so a session that never starts a match
+leaves no files behind.
+"""
+import os
+
+from . import rally_log
+from .replay import InputRecorder
+from .telemetry import TelemetryRecorder
+
+
+class SessionLogs:
+    """Create this session's match_log_* files in `directory` on the first ``open()``."""
+
+    def __init__(self, directory):
+        self.directory = directory
+        self.path = self.stem = self.timings_path = None
+        self.rallies = self.telemetry = self.inputs = None
+
+    def open(self):
+        if self.rallies is not None:
+            return
+        self.path = rally_log.create_unique_log(self.directory)
+        self.stem = stem = os.path.splitext(self.path)[0]
+        # Frame-phase percentiles per match (marvel_pong.frame_timing), only written when timing is on
+        self.timings_path = stem + ".timings.csv"
+        # Rows are written off the frame loop; flushed every 16 rows or 2 s, fsynced after each match
+        self.rallies = rally_log.RallyWriter(self.path, flush_rows=16, flush_ms=2000)
+        # Per-frame state next to the rally log: match_log_*.frames
+        self.telemetry = TelemetryRecorder(stem + ".frames")
+        # Seeds and per-step inputs, replayable with `python -m marvel_pong.replay match_log_*.inputs`
+        self.inputs = InputRecorder(stem + ".inputs")
+
+    def close(self):
+        if self.rallies is not None:
+            self.rallies.close()
+            self.telemetry.close()
+            self.inputs.close()
@@ -0,0 +1,129 @@
+"""
+Per-frame telemetry: a fixed-size binary record of the match state every
+frame, for questions the per-rally log cannot answer (where hits land on the
+paddle, how speed evolves through a rally ...).
+
+Records are packed with one ``struct.Struct`` straight into preallocated
+blocks (no per-frame buffers or lists). A full block is handed to a writer
+thread that appends it to the file in one sequential write; the blocks are
+reused in a ring, so memory stays constant however long the session runs.
+
+    rec = TelemetryRecorder("match.frames")
+    rec.begin_match()
+    ... match.step(...); rec.record(match) ...
+    rec.close()
+
+``load_frames(path)`` maps the file as a NumPy structured array.
+"""
+import atexit
+import queue
+import struct
+import threading
+
+from .engine import STATE_PLAY
+
+# match number, frame in match, rally index | ball x, y, vx, vy |
+# left y, right y, left x offset, right x offset | p1 meter, p2 meter, flags, fake balls
+FRAME_STRUCT = struct.Struct("<3I8f4B")
+FRAME_FIELDS = (
+    "match", "frame", "rally_index",
+    "ball_x", "ball_y", "ball_vx", "ball_vy",
+    "left_y", "right_y", "left_x_offset", "right_x_offset",
+    "p1_meter", "p2_meter", "flags", "fake_balls",
+)
+FRAME_TYPES = ("<u4",) * 3 + ("<f4",) * 8 + ("u1",) * 4
+
+# bits of the `flags` field
+FLAG_INVISIBLE    = 1   # real ball hidden (Invisible Woman)
+FLAG_LEFT_FROZEN  = 2   # left paddle frozen (IW passive or Quicksilver)
+FLAG_RIGHT_FROZEN = 4
+FLAG_PLAYING      = 8   # ball in play (not waiting for a serve)
+
+BLOCK_FRAMES = 8192  # 48 B/frame -> 384 KiB blocks, one write every ~68 s at 120 fps
+
+
+class TelemetryRecorder:
+    """
+    Append one record per ``record(match)`` call to `path`. `blocks` blocks
+    of `block_frames` records form the ring; ``record`` only waits if the
+    writer thread is a whole ring behind. ``close()`` (also run at exit)
+    writes the partial block and closes the file.
+    """
+
+    def __init__(self, path, block_frames=BLOCK_FRAMES, blocks=2):
+        self.path = path
+        self.file = open(path, "wb")
+        self.block_bytes = FRAME_STRUCT.size * block_frames
+        self.blocks = [bytearray(self.block_bytes) for _ in range(blocks)]
+        self._free = queue.Queue()
+        for i in range(1, blocks):
+            self._free.put(i)
+        self._full = queue.Queue()
+        self.index = 0
+        self.block = self.blocks[0]
+        self.offset = 0
+        self.match_no = 0
+        self.frame = 0
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="telemetry-writer", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def begin_match(self):
+        """Number the following frames as a new match, starting at frame 0."""
+        self.match_no += 1
+        self.frame = 0
+
+    def record(self, m):
+        """Pack the current state of Match `m` into the ring."""
+        now = m.clock.now_ms()
+        flags = (m.ball_invisible
+                 | (now < m.freeze_left_until_ms or now < m.p1_qs_freeze_until_ms) << 1
+                 | (now < m.freeze_right_until_ms or now < m.p2_qs_freeze_until_ms) << 2
+                 | (m.state == STATE_PLAY) << 3)
+        FRAME_STRUCT.pack_into(
+            self.block, self.offset, self.match_no, self.frame, m.rally_index,
+            m.ball_x, m.ball_y, m.ball_vel_x, m.ball_vel_y,
+            m.left_y, m.right_y, m.left_x_offset, m.right_x_offset,
+            m.p1_meter, m.p2_meter, flags, min(len(m.fake_balls), 255))
+        self.frame += 1
+        self.offset += FRAME_STRUCT.size
+        if self.offset == self.block_bytes:
+            self._spill()
+
+    def _spill(self):
+        self._full.put((self.index, self.offset))
+        self.index = self._free.get()
+        self.block = self.blocks[self.index]
+        self.offset = 0
+
+    def _run(self):
+        while True:
+            item = self._full.get()
+            if item is None:
+                return
+            i, n = item
+            self.file.write(memoryview(self.blocks[i])[:n])
+            self._free.put(i)
+
+    def close(self):
+        if self._closed:
+            return
+        self._closed = True
+        atexit.unregister(self.close)
+        if self.offset:
+            self._full.put((self.index, self.offset))
+        self._full.put(None)
+        self._thread.join()
+        self.file.close()
+
+
+def frame_dtype():
+    import numpy as np
+    return np.dtype(list(zip(FRAME_FIELDS, FRAME_TYPES)))
+
+
+def load_frames(path):
+    """Memory-map a telemetry file as a NumPy structured array (one row per frame)."""
+    import numpy as np
+    return np.memmap(path, dtype=frame_dtype(), mode="r")